@@ -0,0 +1,134 @@
+"""Convert from asyncio code without blocking the event loop
+
+    async with AsyncConverter(jobs=4, timeout=10) as converter:
+        fprg = await converter.convert_source(source, "submission.py")
+        ok = await converter.convert_file("submission.py", "submission.fprg")
+
+Parsing, conversion and serialization run in a shared pool of worker processes;
+files are read and written in threads. At most `max_concurrency` conversions are
+in flight, the rest wait their turn on the event loop. A conversion that runs
+past its timeout is interrupted inside its worker, so it cannot hold a process
+for longer than that.
+"""
+import asyncio
+import os
+
+from converter import ConversionError
+from diagnostics import ERROR, Diagnostic, DiagnosticCollector
+from workers import TimeLimitExceeded, start_pool, time_limit, warm_up, worker_converter
+
+
+def _convert(source, name, timeout):
+    """Convert in a worker and return (data, diagnostics, error, timed_out)
+
+    Exceptions are returned rather than raised so the diagnostics reported before
+    them still reach the caller.
+    """
+    diagnostics = DiagnosticCollector()
+    data, error, timed_out = None, None, False
+    try:
+        with time_limit(timeout):
+            data = worker_converter().convert_source(source, name, diagnostics=diagnostics)
+    except TimeLimitExceeded:
+        timed_out = True
+    except (SyntaxError, ConversionError) as e:
+        error = e
+    return data, diagnostics.diagnostics, error, timed_out
+
+
+def _read(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+class AsyncConverter:
+    """Asyncio front end to a bounded, shared pool of conversion worker processes"""
+
+    def __init__(self, jobs=None, options=None, max_concurrency=None, timeout=None):
+        self.jobs = jobs or os.cpu_count() or 1
+        self.timeout = timeout
+        self.pool = start_pool(self.jobs, options)
+        self.slots = asyncio.Semaphore(max_concurrency or self.jobs)
+
+    async def warm_up(self):
+        """Start every worker process up front so the first requests are fast"""
+        await asyncio.to_thread(warm_up, self.pool, self.jobs)
+
+    async def convert_source(self, source, name="program", timeout=None, diagnostics=None):
+        """Convert Python source text to .fprg bytes in a worker process
+
+        Raises SyntaxError or ConversionError like the synchronous convert_source, and
+        asyncio.TimeoutError once `timeout` (default: the converter's) has passed.
+        Time spent waiting for a free slot does not count towards the timeout.
+        Cancelling the caller drops a queued conversion; one that already runs is
+        stopped by its own timeout at the latest.
+        """
+        if timeout is None:
+            timeout = self.timeout
+        loop = asyncio.get_running_loop()
+        async with self.slots:
+            future = loop.run_in_executor(self.pool, _convert, source, name, timeout)
+            # The worker interrupts itself at the timeout; the grace period covers a
+            # worker that cannot, e.g. because it is stuck outside the interpreter
+            grace = None if timeout is None else timeout + 1.0
+            data, reported, error, timed_out = await asyncio.wait_for(future, grace)
+        if diagnostics is not None:
+            diagnostics.extend(reported)
+        if timed_out:
+            raise asyncio.TimeoutError(f"Converting '{name}' took longer than {timeout}s")
+        if error is not None:
+            raise error
+        return data
+
+    async def convert_file(self, python_file, output_file=None, timeout=None, diagnostics=None):
+        """Convert a Python file to a .fprg file next to it, or to output_file
+
+        Problems, timeouts included, are reported to `diagnostics`; returns whether a
+        file was written.
+        """
+        if diagnostics is None:
+            diagnostics = DiagnosticCollector()
+        if output_file is None:
+            output_file = os.path.splitext(python_file)[0] + ".fprg"
+
+        def report(code, message):
+            diagnostics.add(Diagnostic(ERROR, code, message, source=python_file))
+
+        try:
+            source = await asyncio.to_thread(_read, python_file)
+        except FileNotFoundError:
+            report("E001", f"File '{python_file}' not found")
+            return False
+        except (OSError, UnicodeDecodeError) as e:
+            report("E004", f"Cannot read '{python_file}': {e}")
+            return False
+
+        try:
+            data = await self.convert_source(source, python_file, timeout, diagnostics)
+        except (SyntaxError, ConversionError):
+            return False
+        except asyncio.TimeoutError as e:
+            report("E301", str(e))
+            return False
+
+        try:
+            await asyncio.to_thread(_write, output_file, data)
+        except OSError as e:
+            report("E003", f"Cannot write '{output_file}': {e}")
+            return False
+        return True
+
+    async def close(self):
+        """Wait for running conversions in a thread, then stop the workers"""
+        await asyncio.to_thread(self.pool.shutdown, cancel_futures=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
@@ -0,0 +1,221 @@
+import contextlib
+import glob
+import hashlib
+import os
+import sys
+import time
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+
+from converter import ConversionError, PythonToFlowgorithmConverter, write_profile
+from diagnostics import DiagnosticCollector
+from profiling import ConversionProfile
+from sinks import open_sink
+
+
+def _has_magic(pattern):
+    return any(c in pattern for c in "*?[")
+
+
+def _glob_base(pattern):
+    """Return the directory part of a glob pattern before the first wildcard"""
+    parts = []
+    for part in pattern.replace("\\", "/").split("/"):
+        if _has_magic(part):
+            break
+        parts.append(part)
+    return "/".join(parts) or "."
+
+
+def _expand(entry, base_dir):
+    """Expand a directory, glob or file path into (source_path, relative_path) pairs"""
+    path = entry if os.path.isabs(entry) else os.path.join(base_dir, entry)
+
+    if os.path.isdir(path):
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if filename.endswith(".py"):
+                    source = os.path.join(dirpath, filename)
+                    yield source, os.path.relpath(source, path)
+    elif _has_magic(entry):
+        root = _glob_base(path)
+        for source in sorted(glob.glob(path, recursive=True)):
+            if os.path.isfile(source):
+                yield source, os.path.relpath(source, root)
+    else:
+        relative = os.path.normpath(entry)
+        if os.path.isabs(relative) or relative.startswith(os.pardir):
+            relative = os.path.basename(relative)
+        yield path, relative
+
+
+def read_manifest(manifest_file):
+    """Read a manifest listing one source path, directory or glob per line"""
+    with open(manifest_file, 'r', encoding='utf-8') as f:
+        entries = [line.strip() for line in f]
+    return [entry for entry in entries if entry and not entry.startswith('#')]
+
+
+def collect_sources(inputs, manifest=None):
+    """Collect (source_path, relative_path) pairs from inputs and an optional manifest"""
+    entries = [(entry, ".") for entry in inputs or []]
+    if manifest:
+        base_dir = os.path.dirname(manifest) or "."
+        entries.extend((entry, base_dir) for entry in read_manifest(manifest))
+
+    sources = []
+    seen = set()
+    for entry, base_dir in entries:
+        for source, relative in _expand(entry, base_dir):
+            key = os.path.abspath(source)
+            if key not in seen:
+                seen.add(key)
+                sources.append((source, relative))
+    return sources
+
+
+def convert_one(source_path, options=None, profile=False):
+    """Convert a single file with a fresh converter and return the .fprg bytes with the outcome
+    
+    The output is returned rather than written, so the parent process can send it to
+    any sink. The conversion cache is consulted and filled the same way convert_file does,
+    so conversions that reported diagnostics are not cached.
+    """
+    start = time.perf_counter()
+    options = dict(options or {})
+    if profile:
+        options['profile'] = ConversionProfile()
+    diagnostics = DiagnosticCollector()
+    data, digest, error = None, None, None
+    try:
+        converter = PythonToFlowgorithmConverter(diagnostics=diagnostics, **options)
+        converter.source_name = os.path.basename(source_path)
+        with open(source_path, 'rb') as f:
+            converter.check_source_size(os.fstat(f.fileno()).st_size)
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        cache_key = None
+        if converter.cache is not None:
+            cache_key = converter.cache.key(raw, converter.cache_options(source_path))
+            data = converter.cache.get(cache_key)
+        if data is None:
+            data = converter.convert_source(raw.decode('utf-8'), os.path.basename(source_path),
+                                            diagnostics=diagnostics)
+            if cache_key is not None and not diagnostics.diagnostics:
+                converter.cache.put(cache_key, data)
+    except SyntaxError as e:
+        error = f"Syntax error in Python file: {e}"
+    except ConversionError as e:
+        error = str(e)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+
+    return {
+        'source': source_path,
+        'sha256': digest,
+        'data': data,
+        'success': error is None,
+        'error': error,
+        'diagnostics': diagnostics.diagnostics,
+        'seconds': time.perf_counter() - start,
+        'profile': options['profile'].to_dict() if profile else None,
+    }
+
+
+def convert_batch(inputs, output_dir="output", jobs=None, manifest=None, options=None, profile=None,
+                  archive=None, diagnostics=None):
+    """Convert many Python files in parallel, one fresh converter per file
+    
+    Results are written in order to the sink chosen by `archive` (see sinks.open_sink),
+    or as separate files below output_dir. Diagnostics from the workers are added to
+    the `diagnostics` collector in the same order. With `profile` set to a path (or '-'
+    for stderr), the per-file profiles collected in the workers are merged and written
+    there as JSON.
+    """
+    if diagnostics is None:
+        diagnostics = DiagnosticCollector()
+    sources = collect_sources(inputs, manifest)
+    if not sources:
+        print("No Python files found to convert")
+        return []
+
+    source_paths = [source for source, _ in sources]
+    names = [os.path.splitext(relative)[0] + ".fprg" for _, relative in sources]
+    epoch = PythonToFlowgorithmConverter(**(options or {})).get_reproducible_epoch()
+
+    try:
+        sink = open_sink(archive, output_dir, mtime=epoch)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return []
+
+    with sink, \
+            contextlib.redirect_stdout(sys.stderr if sink.to_stdout else sys.stdout):
+        start = time.perf_counter()
+        if jobs == 1:
+            results = _report(map(convert_one, source_paths, repeat(options), repeat(bool(profile))),
+                              names, sink, diagnostics)
+        else:
+            workers = jobs or os.cpu_count() or 1
+            chunksize = max(1, len(sources) // (workers * 8))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = _report(pool.map(convert_one, source_paths, repeat(options),
+                                           repeat(bool(profile)), chunksize=chunksize),
+                                  names, sink, diagnostics)
+        if sink.writes_manifest:
+            sink.write_manifest([{
+                'path': result['output'],
+                'source': result['source'],
+                'source_sha256': result['sha256'],
+                'status': "ok" if result['success'] else "failed",
+                'error': result['error'],
+                'diagnostics': [diagnostic.to_dict() for diagnostic in result['diagnostics']],
+            } for result in results])
+        elapsed = time.perf_counter() - start
+
+        succeeded = sum(1 for result in results if result['success'])
+        rate = len(results) / elapsed if elapsed > 0 else float('inf')
+        print(f"\nConverted {succeeded}/{len(results)} files in {elapsed:.2f}s ({rate:.1f} files/s)")
+        if succeeded != len(results):
+            print(f"{len(results) - succeeded} file(s) failed")
+
+    if profile:
+        merged = ConversionProfile()
+        for result in results:
+            if result['profile'] is not None:
+                merged.merge(result['profile'])
+        write_profile(merged, profile)
+    return results
+
+
+def _report(results, names, sink, diagnostics):
+    """Write each result to the sink and report its status and diagnostics as it arrives
+
+    Sources from different inputs can map to the same output name, e.g. sub/loop.py
+    below two input directories; only the first is written, the others fail.
+    """
+    collected = []
+    written = {}
+    for result, name in zip(results, names):
+        result['output'] = name
+        data = result.pop('data')
+        if result['success'] and name in written:
+            result['success'] = False
+            result['error'] = f"Output '{name}' is already written for {written[name]}"
+        if result['success']:
+            try:
+                sink.write(name, data)
+            except OSError as e:
+                result['success'], result['error'] = False, f"Error writing output file: {e}"
+        if result['success']:
+            written[name] = result['source']
+            print(f"OK    {result['source']} -> {sink.location(name)} ({result['seconds'] * 1000:.1f} ms)")
+        else:
+            print(f"FAIL  {result['source']}: {result['error']}")
+        diagnostics.extend(result['diagnostics'])
+        if diagnostics.stream is None:
+            for diagnostic in result['diagnostics']:
+                print(f"      {diagnostic}")
+        collected.append(result)
+    return collected
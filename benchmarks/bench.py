@@ -0,0 +1,152 @@
+"""Time and measure each conversion stage on synthetic programs
+
+    python benchmarks/bench.py                        run every case
+    python benchmarks/bench.py --save baseline.json   record a baseline
+    python benchmarks/bench.py --compare baseline.json
+"""
+import argparse
+import ast
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from converter import PythonToFlowgorithmConverter
+from synth import generate_program
+
+CASES = {
+    'small': dict(functions=5, depth=3, statements=20, array_size=10, expr_length=4),
+    'many-functions': dict(functions=200, depth=2, statements=20, array_size=10, expr_length=4),
+    'deep': dict(functions=5, depth=12, statements=400, array_size=10, expr_length=4),
+    'long-expressions': dict(functions=10, depth=2, statements=50, array_size=10, expr_length=200),
+    'large-arrays': dict(functions=2, depth=2, statements=20, array_size=20000, expr_length=4),
+}
+
+STAGES = ('parse', 'extract_comments', 'conversion', 'serialization')
+
+
+def run_stages(source, measure):
+    """Run every stage once, calling measure(stage, func) to time or trace it"""
+    converter = PythonToFlowgorithmConverter(source_date_epoch=0)
+    tree = measure('parse', lambda: ast.parse(source))
+    measure('extract_comments', lambda: converter.extract_comments(source, tree))
+    root = measure('conversion', lambda: converter.build_tree(tree, "bench.py"))
+    measure('serialization', lambda: converter.write_xml(root, io.StringIO()))
+
+
+def time_stages(source, repeat):
+    """Return the best wall time in seconds for each stage"""
+    best = {stage: float('inf') for stage in STAGES}
+
+    def measure(stage, func):
+        start = time.perf_counter()
+        result = func()
+        best[stage] = min(best[stage], time.perf_counter() - start)
+        return result
+
+    for _ in range(repeat):
+        run_stages(source, measure)
+    return best
+
+
+def memory_stages(source):
+    """Return the peak traced memory in bytes for each stage"""
+    peaks = {}
+
+    def measure(stage, func):
+        tracemalloc.start()
+        try:
+            return func()
+        finally:
+            peaks[stage] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    run_stages(source, measure)
+    return peaks
+
+
+def run_case(knobs, repeat, seed):
+    source = generate_program(seed=seed, **knobs)
+    return {
+        'source_bytes': len(source.encode('utf-8')),
+        'seconds': time_stages(source, repeat),
+        'peak_bytes': memory_stages(source),
+    }
+
+
+def print_results(results, baseline=None):
+    print(f"{'case':<18} {'stage':<18} {'time (ms)':>10} {'peak (KiB)':>11} {'vs base':>9}")
+    for case, result in results.items():
+        for stage in STAGES:
+            seconds = result['seconds'][stage]
+            line = (f"{case:<18} {stage:<18} {seconds * 1000:>10.2f} "
+                    f"{result['peak_bytes'][stage] / 1024:>11.1f}")
+            if baseline and case in baseline:
+                base = baseline[case]['seconds'].get(stage)
+                if base:
+                    line += f" {(seconds / base - 1) * 100:>+8.1f}%"
+            print(line)
+
+
+def find_regressions(results, baseline, threshold):
+    """Return (case, stage, ratio) for stages slower than the baseline by more than threshold"""
+    regressions = []
+    for case, result in results.items():
+        if case not in baseline:
+            continue
+        for stage in STAGES:
+            base = baseline[case]['seconds'].get(stage)
+            if base and result['seconds'][stage] > base * (1 + threshold):
+                regressions.append((case, stage, result['seconds'][stage] / base))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the converter stage by stage")
+    parser.add_argument("--case", action="append", choices=sorted(CASES),
+                        help="run only this case (repeatable)")
+    parser.add_argument("--functions", type=int, help="run a custom case with these knobs instead")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--statements", type=int, default=20)
+    parser.add_argument("--array-size", type=int, default=10)
+    parser.add_argument("--expr-length", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs per case; the best is kept")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare against a baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="slowdown ratio reported as a regression (default: 0.10)")
+    args = parser.parse_args()
+
+    if args.functions is not None:
+        cases = {'custom': dict(functions=args.functions, depth=args.depth, statements=args.statements,
+                                array_size=args.array_size, expr_length=args.expr_length)}
+    else:
+        cases = {name: CASES[name] for name in (args.case or CASES)}
+
+    results = {name: run_case(knobs, args.repeat, args.seed) for name, knobs in cases.items()}
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if baseline:
+        regressions = find_regressions(results, baseline, args.threshold)
+        for case, stage, ratio in regressions:
+            print(f"Regression: {case}/{stage} is {ratio:.2f}x the baseline")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Check converter start-up: import time, lazily imported modules and short CLI runs
+
+    python benchmarks/startup.py                      report, exit 1 on a regression
+    python benchmarks/startup.py --threshold-ms 15    tighter import-time budget
+
+Import times come from `python -X importtime -c "import converter"`, best of
+several fresh interpreters. The check fails when importing converter takes
+longer than the threshold, or when a module that only some stages need is
+imported eagerly again.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported inside the stages that need them; none may load with `import converter`
+LAZY_MODULES = ('argparse', 'base64', 'concurrent.futures', 'datetime', 'json', 're',
+                'tokenize', 'xml.etree.ElementTree')
+
+CLI_RUNS = {
+    '--help': ['--help'],
+    'missing file': ['does-not-exist.py'],
+}
+
+
+def import_times(module, python=sys.executable):
+    """Return {module name: (self us, cumulative us)} for one fresh `import module`"""
+    result = subprocess.run([python, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(own), int(cumulative))
+    return times
+
+
+def eager_modules(module, python=sys.executable):
+    """Return the LAZY_MODULES that importing module loads"""
+    code = (f"import sys, {module}\n"
+            f"print(' '.join(name for name in {LAZY_MODULES!r} if name in sys.modules))")
+    result = subprocess.run([python, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+
+def cli_time(args, repeat, python=sys.executable):
+    """Return the best wall time in seconds of `python converter.py args`"""
+    script = os.path.join(ROOT, 'converter.py')
+    best = float('inf')
+    # The CLI creates input/ and output/ in the working directory
+    with tempfile.TemporaryDirectory() as cwd:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run([python, script, *args], cwd=cwd, capture_output=True)
+            best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check converter start-up time")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per measurement")
+    parser.add_argument("--threshold-ms", type=float, default=30.0,
+                        help="fail when importing converter takes longer (default: 30)")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    args = parser.parse_args()
+
+    runs = [import_times('converter') for _ in range(args.repeat)]
+    best = min(runs, key=lambda times: times['converter'][1])
+    total_ms = best['converter'][1] / 1000
+    print(f"import converter: {total_ms:.1f} ms (best of {args.repeat})")
+    for name, (own, cumulative) in sorted(best.items(), key=lambda item: -item[1][0])[:args.top]:
+        print(f"    {own / 1000:7.2f} ms self {cumulative / 1000:7.2f} ms total  {name}")
+
+    for label, cli_args in CLI_RUNS.items():
+        print(f"converter.py {label}: {cli_time(cli_args, args.repeat) * 1000:.1f} ms")
+
+    failed = False
+    eager = eager_modules('converter')
+    if eager:
+        print(f"FAIL  imported eagerly: {', '.join(eager)}")
+        failed = True
+    if total_ms > args.threshold_ms:
+        print(f"FAIL  import time {total_ms:.1f} ms is over the {args.threshold_ms:.0f} ms threshold")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
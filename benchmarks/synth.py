@@ -0,0 +1,122 @@
+"""Generate synthetic Python programs in the subset the converter supports"""
+import argparse
+import random
+
+
+class ProgramGenerator:
+    """Build a random but valid, terminating program from a handful of size knobs"""
+
+    def __init__(self, functions=5, depth=3, statements=20, array_size=10, expr_length=4, seed=0):
+        self.functions = functions
+        self.depth = depth
+        self.statements = statements
+        self.array_size = array_size
+        self.expr_length = expr_length
+        self.random = random.Random(seed)
+
+    def generate(self):
+        lines = []
+        for index in range(self.functions):
+            lines.extend(self.function(index))
+            lines.append("")
+        lines.extend(self.main())
+        return "\n".join(lines) + "\n"
+
+    def function(self, index):
+        lines = [f"def f{index}(a, b): # int int int", "    r = a"]
+        lines.extend(self.block(1, self.depth, self.statements, ["a", "b", "r"], "r", False))
+        lines.append("    return r")
+        return lines
+
+    def main(self):
+        names = ["v0", "v1", "v2", "v3"]
+        lines = [f"{name} = {self.random.randint(0, 9)}" for name in names]
+        if self.array_size:
+            values = ", ".join(str(self.random.randint(0, 99)) for _ in range(self.array_size))
+            lines.append(f"data = [{values}] # {self.array_size}")
+        lines.extend(self.block(0, self.depth, self.statements, names, "v0", bool(self.array_size)))
+        for index in range(self.functions):
+            lines.append(f"v1 = f{index}(v0, v2)")
+        lines.append("print(v1)")
+        return lines
+
+    def expression(self, names, arrays):
+        terms = []
+        for _ in range(self.expr_length):
+            if names and self.random.random() < 0.7:
+                term = self.random.choice(names)
+            else:
+                term = str(self.random.randint(1, 9))
+            if arrays and self.random.random() < 0.1:
+                term = f"data[{self.random.randint(0, self.array_size - 1)}]"
+            terms.append(term)
+
+        expr = terms[0]
+        for term in terms[1:]:
+            op = self.random.choice(["+", "-", "+", "-", "*"])
+            if op == "*":
+                expr = f"({expr}) * 2" if self.random.random() < 0.5 else f"{expr} + {term} * 2"
+            else:
+                expr = f"{expr} {op} {term}"
+        return expr
+
+    def block(self, indent, depth, budget, names, target, arrays):
+        pad = "    " * indent
+        lines = []
+        while budget > 0:
+            kinds = ["assign", "assign", "print"]
+            if depth > 0 and budget >= 3:
+                kinds += ["if", "while", "for"]
+            kind = self.random.choice(kinds)
+
+            if kind == "assign":
+                lines.append(f"{pad}{target} = {self.expression(names, arrays)}")
+                budget -= 1
+            elif kind == "print":
+                lines.append(f"{pad}print({self.random.choice(names)})")
+                budget -= 1
+            else:
+                inner = self.random.randint(1, max(1, budget // 2))
+                budget -= inner + 1
+                lines.extend(self.compound(kind, pad, indent, depth, inner, names, target, arrays))
+        return lines
+
+    def compound(self, kind, pad, indent, depth, budget, names, target, arrays):
+        if kind == "if":
+            lines = [f"{pad}if {self.random.choice(names)} > {self.random.randint(0, 9)}:"]
+            lines.extend(self.block(indent + 1, depth - 1, budget, names, target, arrays))
+            lines.append(f"{pad}else:")
+            lines.extend(self.block(indent + 1, depth - 1, max(1, budget // 2), names, target, arrays))
+            return lines
+
+        counter = f"k{depth}" if kind == "while" else f"i{depth}"
+        inner_names = names + [counter]
+        if kind == "while":
+            lines = [f"{pad}{counter} = 0", f"{pad}while {counter} < {self.random.randint(1, 4)}:"]
+            lines.append(f"{pad}    {counter} = {counter} + 1")
+        else:
+            lines = [f"{pad}for {counter} in range(0, {self.random.randint(1, 4)}):"]
+        lines.extend(self.block(indent + 1, depth - 1, budget, inner_names, target, arrays))
+        return lines
+
+
+def generate_program(functions=5, depth=3, statements=20, array_size=10, expr_length=4, seed=0):
+    """Return the source of one synthetic program"""
+    return ProgramGenerator(functions, depth, statements, array_size, expr_length, seed).generate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print a synthetic Python program for the converter")
+    parser.add_argument("--functions", type=int, default=5)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--statements", type=int, default=20)
+    parser.add_argument("--array-size", type=int, default=10)
+    parser.add_argument("--expr-length", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(generate_program(args.functions, args.depth, args.statements,
+                           args.array_size, args.expr_length, args.seed), end="")
+
+
+if __name__ == "__main__":
+    main()
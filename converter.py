@@ -1,17 +1,115 @@
 import ast
-import xml.etree.ElementTree as ET
-import xml.dom.minidom as minidom
 import sys
 import os
-import re
-from datetime import datetime
-import base64
+import io
+import math
+from contextlib import nullcontext
+from itertools import repeat
+
+# Modules only some stages need (argparse, tokenize, datetime, base64,
+# concurrent.futures) are imported where they are used, so a CLI run that
+# fails early or prints --help does not pay for them.
+
+import ir
+from diagnostics import ERROR, Diagnostic, DiagnosticCollector
+from symbols import SymbolTable, input_call
+
+_converter_version = None
+
+_NOT_PROFILED = nullcontext()
+
+def converter_version():
+    """Return a hash of the modules that shape the output, computed on first use
+    
+    Cached conversions are keyed on it, so any change to these modules
+    invalidates them without a manual version bump.
+    """
+    global _converter_version
+    if _converter_version is None:
+        import hashlib
+        digest = hashlib.sha256()
+        for path in (__file__, ir.__file__, sys.modules[SymbolTable.__module__].__file__):
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        _converter_version = digest.hexdigest()[:16]
+    return _converter_version
+
+class ConversionError(Exception):
+    """Raised when a program cannot be converted"""
+
+def _handles(table, *node_types):
+    """Register the decorated method as the handler for the given AST node types"""
+    def register(method):
+        for node_type in node_types:
+            table[node_type] = method
+        return method
+    return register
 
 class PythonToFlowgorithmConverter:
-    def __init__(self):
+    HINT_TYPES = ('int', 'integer', 'string', 'str', 'float', 'double', 'boolean', 'bool')
+    
+    STATEMENT_HANDLERS = {}
+    EXPRESSION_HANDLERS = {}
+    
+    BINOP_SYMBOLS = {
+        ast.Add: '+', ast.Sub: '-', ast.Mult: '*',
+        ast.Div: '/', ast.Mod: '%', ast.Pow: '^',
+        ast.BitAnd: '&'
+    }
+    COMPARE_SYMBOLS = {
+        ast.Eq: '==', ast.NotEq: '!=', ast.Lt: '<',
+        ast.LtE: '<=', ast.Gt: '>', ast.GtE: '>='
+    }
+    UNARYOP_SYMBOLS = {
+        ast.USub: '-', ast.UAdd: '+', ast.Not: 'not '
+    }
+    
+    MIN_ARRAY_RUN = 4
+    ARRAY_CHUNK_SIZE = 256
+    ARRAY_CHUNK_BASE = 0x100
+    ARRAY_CHUNK_SPAN = 0xD7FF - ARRAY_CHUNK_BASE
+    
+    PREC_OR, PREC_AND, PREC_COMPARE, PREC_ADD, PREC_MULT, PREC_UNARY, PREC_POW, PREC_ATOM = range(1, 9)
+    BINOP_PRECEDENCE = {
+        ast.Add: PREC_ADD, ast.Sub: PREC_ADD, ast.BitAnd: PREC_ADD,
+        ast.Mult: PREC_MULT, ast.Div: PREC_MULT, ast.Mod: PREC_MULT,
+        ast.Pow: PREC_POW
+    }
+    
+    def __init__(self, compact=False, source_date_epoch=None, cache=None, profile=None, max_depth=1000,
+                 function_jobs=1, array_threshold=32, optimize=False, fail_fast=False, diagnostics=None,
+                 max_source_bytes=10000000, max_ast_nodes=5000000, max_elements=1000000,
+                 max_output_bytes=100000000):
+        self.compact = compact
+        self.source_date_epoch = source_date_epoch
+        self.cache = cache
+        self.profile = profile
+        self.max_depth = max_depth
+        self.max_source_bytes = max_source_bytes
+        self.max_ast_nodes = max_ast_nodes
+        self.max_elements = max_elements
+        self.max_output_bytes = max_output_bytes
+        # Budgets are compared on every statement, so None (unlimited) becomes infinity once here
+        self.depth_budget = math.inf if max_depth is None else max_depth
+        self.ast_node_budget = math.inf if max_ast_nodes is None else max_ast_nodes
+        self.element_budget = math.inf if max_elements is None else max_elements
+        self.ast_nodes = 0
+        self.elements = 0
+        self.function_jobs = function_jobs
+        self.array_threshold = array_threshold
+        self.optimize = optimize
+        self.fail_fast = fail_fast
+        self.diagnostics = diagnostics if diagnostics is not None else DiagnosticCollector()
+        self.source_name = None
+        self.nested_bodies = []
+        self.symbols = None
         self.variables = {}
+        self.declarations = []
+        self.counters = set()
         self.element_id = 0
         self.comments = {}
+        self.hints = {}
+        self.scope = None
         self.function_signatures = {}
         
     def get_next_id(self):
@@ -19,209 +117,368 @@ class PythonToFlowgorithmConverter:
         self.element_id += 1
         return str(self.element_id)
     
-    def create_flowgorithm_xml(self, python_file):
-        """Create the base Flowgorithm XML structure"""
-        root = ET.Element("flowgorithm", fileversion="4.2")
-        
-        attributes = ET.SubElement(root, "attributes")
+    def report(self, severity, code, message, node=None, line=None, column=None):
+        """Record a diagnostic at an AST node or position; with fail_fast, errors abort"""
+        if node is not None:
+            line, column = node.lineno, node.col_offset + 1
+        diagnostic = self.diagnostics.add(Diagnostic(severity, code, message, line, column, self.source_name))
+        if self.fail_fast and severity == ERROR:
+            raise ConversionError(str(diagnostic))
+        return diagnostic
+    
+    def exceed_budget(self, code, message, node=None):
+        """Report an exceeded resource budget and abort the conversion"""
+        diagnostic = self.report(ERROR, code, message, node)
+        raise ConversionError(str(diagnostic))
+    
+    def check_source_size(self, size):
+        if self.max_source_bytes is not None and size > self.max_source_bytes:
+            self.exceed_budget("E202", f"Source is {size} bytes, over the limit of {self.max_source_bytes}")
+    
+    def check_budgets(self, node=None):
+        """Abort once more AST nodes or flowchart elements were converted than budgeted"""
+        if self.ast_nodes > self.ast_node_budget:
+            self.exceed_budget("E203", f"Source has more than {self.max_ast_nodes} AST nodes", node)
+        if self.elements > self.element_budget:
+            self.exceed_budget("E204", f"Flowchart has more than {self.max_elements} elements", node)
+    
+    def stage(self, name, detail=None):
+        """Time a conversion stage when profiling is enabled"""
+        if self.profile is None:
+            return _NOT_PROFILED
+        return self.profile.stage(name, detail)
+    
+    def get_reproducible_epoch(self):
+        """Return the pinned timestamp from the constructor or SOURCE_DATE_EPOCH, if any"""
+        epoch = self.source_date_epoch
+        if epoch is None:
+            epoch = os.environ.get("SOURCE_DATE_EPOCH") or None
+        return int(epoch) if epoch is not None else None
+    
+    def get_timestamp(self):
+        """Return the save time, pinned in reproducible mode"""
+        from datetime import datetime, timezone
+        epoch = self.get_reproducible_epoch()
+        if epoch is None:
+            return datetime.now()
+        return datetime.fromtimestamp(epoch, tz=timezone.utc)
+    
+    def cache_options(self, python_file):
+        """Return everything besides the source bytes that affects the output"""
+        return {
+            'version': converter_version(),
+            'name': os.path.splitext(os.path.basename(python_file))[0],
+            'compact': self.compact,
+            'epoch': self.get_reproducible_epoch(),
+            'array_threshold': self.array_threshold,
+            'optimize': self.optimize,
+            'fail_fast': self.fail_fast,
+            'max_depth': self.max_depth,
+            'max_source_bytes': self.max_source_bytes,
+            'max_ast_nodes': self.max_ast_nodes,
+            'max_elements': self.max_elements,
+            'max_output_bytes': self.max_output_bytes,
+        }
+    
+    def create_program(self, python_file):
+        """Create the base Flowgorithm program with its attributes and no functions"""
+        root = ir.Program()
+        attributes = root.attributes
         
         filename = os.path.splitext(os.path.basename(python_file))[0]
-        ET.SubElement(attributes, "attribute", name="name", value=f"{filename}_converted")
-        ET.SubElement(attributes, "attribute", name="authors", value="Python Converter")
-        ET.SubElement(attributes, "attribute", name="about", value=f"Converted from {filename}.py")
+        attributes.append(ir.Attribute("name", f"{filename}_converted"))
+        attributes.append(ir.Attribute("authors", "Python Converter"))
+        attributes.append(ir.Attribute("about", f"Converted from {filename}.py"))
         
-        now = datetime.now().strftime("%Y-%m-%d %I:%M:%S %p")
-        ET.SubElement(attributes, "attribute", name="saved", value=now)
+        now = self.get_timestamp().strftime("%Y-%m-%d %I:%M:%S %p")
+        attributes.append(ir.Attribute("saved", now))
         
+        import base64
         creation_info = f"Converted;{now}".encode('utf-8')
         creation_b64 = base64.b64encode(creation_info).decode('utf-8')
-        ET.SubElement(attributes, "attribute", name="created", value=creation_b64)
-        ET.SubElement(attributes, "attribute", name="edited", value=creation_b64)
+        attributes.append(ir.Attribute("created", creation_b64))
+        attributes.append(ir.Attribute("edited", creation_b64))
         
         return root
     
     def parse_python_file(self, file_path):
-        """Parse Python file and return AST with comments"""
+        """Parse Python file and return AST with comments, or None after reporting why not"""
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
+                self.check_source_size(os.fstat(f.fileno()).st_size)
                 content = f.read()
             
-            self.extract_comments(content)
+            with self.stage("parse"):
+                tree = ast.parse(content)
             
-            return ast.parse(content)
-        except Exception as e:
-            print(f"Error parsing Python file: {e}")
-            return None
+            with self.stage("extract_comments"):
+                self.extract_comments(content, tree)
+            
+            return tree
+        except SyntaxError as e:
+            self.report(ERROR, "E002", f"Syntax error: {e.msg}", line=e.lineno, column=e.offset)
+        except (OSError, UnicodeDecodeError) as e:
+            self.report(ERROR, "E004", f"Cannot read the source: {e}")
+        except (RecursionError, MemoryError, ValueError) as e:
+            self.report_unparseable(e)
+        return None
     
-    def extract_comments(self, content):
-        """Extract comments for type hints"""
+    def report_unparseable(self, error):
+        """Report a source that ast.parse rejected without a SyntaxError as E002
+        
+        Deeply nested sources raise RecursionError or MemoryError; null bytes raise
+        ValueError on older Pythons.
+        """
+        if isinstance(error, ValueError):
+            message = f"Syntax error: {error}"
+        else:
+            message = "Syntax error: the source is nested too deeply to parse"
+        return self.report(ERROR, "E002", message)
+    
+    def extract_comments(self, content, tree):
+        """Index type hint comments by (line, scope)
+        
+        Function scopes come from the parsed tree. Only lines containing '#' are
+        looked at, and a line is tokenized only when a quote before its '#' might
+        put it inside a string. A comment on a continuation line belongs to the
+        statement it continues, which is then tokenized as a whole.
+        """
+        scopes = [(func.lineno + 1, func.end_lineno, func.name)
+                  for func in tree.body if isinstance(func, ast.FunctionDef)]
+        scope_index = 0
+        done_until = 0
         lines = content.split('\n')
-        for i, line in enumerate(lines):
-            if '#' in line:
-                comment = line.split('#')[1].strip().lower()
-                
-
-                if 'def ' in line:
-                    func_match = re.search(r'def\s+(\w+)\s*\([^)]*\)', line)
-                    if func_match:
-                        func_name = func_match.group(1)
-                        types = comment.split()
-                        if types:
-                            return_type = types[0] if types else 'void'
-                            param_types = types[1:] if len(types) > 1 else []
-                            self.function_signatures[func_name] = {
-                                'return_type': return_type,
-                                'param_types': param_types
-                            }
-                
-                if comment.isdigit():
-                    decl_line = i
-                    while decl_line >= 0 and not lines[decl_line].strip():
-                        decl_line -= 1
-                    
-                    if decl_line >= 0:
-                        match = re.search(r'(\w+)\s*=\s*\[', lines[decl_line])
-                        if match:
-                            var_name = match.group(1)
-                            self.comments[var_name] = comment
-                
-                if comment in ['int', 'integer', 'string', 'str', 'float', 'double', 'boolean', 'bool']:
-                    decl_line = i
-                    while decl_line >= 0 and not lines[decl_line].strip():
-                        decl_line -= 1
-                    
-                    if decl_line >= 0:
-                        match = re.search(r'(\w+)\s*=', lines[decl_line])
-                        if match:
-                            var_name = match.group(1)
-                            self.comments[var_name] = comment
-    
-    def convert_type_to_flowgorithm(self, type_str):
-        """Convert type string to Flowgorithm type"""
-        type_map = {
-            'int': 'Integer',
-            'integer': 'Integer',
-            'str': 'String',
-            'string': 'String',
-            'float': 'Real',
-            'double': 'Real',
-            'real': 'Real',
-            'bool': 'Boolean',
-            'boolean': 'Boolean',
-            'void': 'None'
-        }
-        return type_map.get(type_str.lower(), 'Integer')
-    
-    def convert_expression(self, expr):
-        """Convert Python expression to string representation"""
-        if isinstance(expr, ast.Constant):
-            if isinstance(expr.value, str):
-                return f'"{expr.value}"'
-            return str(expr.value)
-        elif isinstance(expr, ast.Name):
-            return expr.id
-        elif isinstance(expr, ast.Subscript):
-            array_name = self.convert_expression(expr.value)
-            index = self.convert_expression(expr.slice)
-            return f"{array_name}[{index}]"
-        elif isinstance(expr, ast.BinOp):
-            left = self.convert_expression(expr.left)
-            right = self.convert_expression(expr.right)
-            op_map = {
-                ast.Add: '+', ast.Sub: '-', ast.Mult: '*', 
-                ast.Div: '/', ast.Mod: '%', ast.Pow: '^',
-                ast.BitAnd: '&'
-            }
-            op = op_map.get(type(expr.op), '?')
-            return f"{left} {op} {right}"
-        elif isinstance(expr, ast.Compare):
-            left = self.convert_expression(expr.left)
-            comparisons = []
-            for i, (op, comp) in enumerate(zip(expr.ops, expr.comparators)):
-                op_map = {
-                    ast.Eq: '==', ast.NotEq: '!=', ast.Lt: '<',
-                    ast.LtE: '<=', ast.Gt: '>', ast.GtE: '>='
-                }
-                op_str = op_map.get(type(op), '==')
-                comp_str = self.convert_expression(comp)
-                if i == 0:
-                    comparisons.append(f"{left} {op_str} {comp_str}")
+        
+        for number, line in enumerate(lines, 1):
+            index = line.find('#')
+            if index < 0 or number <= done_until:
+                continue
+            
+            while scope_index < len(scopes) and scopes[scope_index][1] < number:
+                scope_index += 1
+            scope = None
+            if scope_index < len(scopes) and scopes[scope_index][0] <= number:
+                scope = scopes[scope_index][2]
+            
+            span = self.statement_span(tree, number)
+            if span is not None:
+                start, done_until = span
+                comment = self.find_comment("\n".join(lines[start - 1:done_until]) + "\n")
+                line = lines[start - 1]
+            else:
+                start = number
+                code = line[:index]
+                if '"' in code or "'" in code:
+                    comment = self.find_comment(line + "\n")
                 else:
-                    comparisons.append(f"{op_str} {comp_str}")
-            return " and ".join(comparisons)
-        elif isinstance(expr, ast.BoolOp):
-            if isinstance(expr.op, ast.And):
-                return " and ".join(self.convert_expression(v) for v in expr.values)
-            elif isinstance(expr.op, ast.Or):
-                return " or ".join(self.convert_expression(v) for v in expr.values)
-        elif isinstance(expr, ast.Call):
-            if isinstance(expr.func, ast.Name):
-                if expr.func.id == 'input':
-                    prompt = '""'
-                    if expr.args:
-                        prompt = self.convert_expression(expr.args[0])
-                    return prompt
-                elif expr.func.id == 'print':
-                    if expr.args:
-                        return self.convert_expression(expr.args[0])
-                    return '""'
-                elif expr.func.id == 'Size':
-                    if expr.args:
-                        array_name = self.convert_expression(expr.args[0])
-                        return f"Size({array_name})"
-                    return "Size()"
-                elif expr.func.id in ['int', 'float', 'str']:
-                    if expr.args:
-                        return self.convert_expression(expr.args[0])
+                    comment = line[index + 1:]
+                if not code.strip():
+                    continue
+            
+            if comment is not None:
+                self.record_hint(start, line, comment.split('#')[0].strip().lower(), scope)
+    
+    def statement_span(self, tree, number):
+        """Return (first, last) line of the simple statement spanning several lines
+        that contains line number, or None
+        
+        Descends by binary search through the statement lists that enclose the line.
+        """
+        statements = tree.body
+        while statements:
+            low, high = 0, len(statements)
+            while low < high:
+                middle = (low + high) // 2
+                if statements[middle].lineno <= number:
+                    low = middle + 1
                 else:
-                    args = [self.convert_expression(arg) for arg in expr.args]
-                    return f"{expr.func.id}({', '.join(args)})"
-            return "function_call"
-        elif isinstance(expr, ast.List):
-            return [self.convert_expression(elem) for elem in expr.elts]
-        else:
-            return str(expr)
-    
-    def get_variable_type(self, var_name, default="Integer"):
-        """Get variable type from comments or context"""
-        if var_name in self.comments:
-            comment = self.comments[var_name]
-            if comment in ['int', 'integer']:
-                return "Integer"
-            elif comment in ['str', 'string']:
-                return "String"
-            elif comment in ['float', 'double']:
-                return "Real"
-            elif comment in ['bool', 'boolean']:
-                return "Boolean"
-        
-        if var_name in self.variables:
-            return self.variables[var_name]
-        
-        return default
-    
-    def create_element(self, tag, **attrs):
-        elem = ET.Element(tag)
-        for key, value in attrs.items():
-            elem.set(key, str(value))
-        return elem
-
+                    high = middle
+            if low == 0 or statements[low - 1].end_lineno < number:
+                return None
+            node = statements[low - 1]
+            if not hasattr(node, 'body'):
+                if node.end_lineno > node.lineno:
+                    return (node.lineno, node.end_lineno)
+                return None
+            
+            statements = None
+            for field in ('body', 'orelse', 'handlers', 'finalbody'):
+                children = getattr(node, field, None)
+                if (type(children) is list and children
+                        and children[0].lineno <= number <= children[-1].end_lineno):
+                    statements = children
+                    break
+        return None
     
-    def declare_variable(self, parent, var_name, default_type="Integer", is_array=False, array_size=""):
-        """Declare a variable if not already declared"""
-        if var_name not in self.variables:
-            var_type = self.get_variable_type(var_name, default_type)
+    def find_comment(self, text):
+        """Return the text after '#' of the last comment token in text, or None"""
+        import tokenize
+        comment = None
+        try:
+            for token in tokenize.generate_tokens(io.StringIO(text).readline):
+                if token.type == tokenize.COMMENT:
+                    comment = token.string[1:]
+        except (tokenize.TokenError, SyntaxError):
+            pass
+        return comment
+    
+    def record_hint(self, line, code, comment, scope):
+        """Store the hint comment of the statement starting at line, whose first line is code"""
+        self.hints[(line, scope)] = comment
+        
+        stripped = code.lstrip()
+        if stripped.startswith('def '):
+            func_name = stripped[4:].split('(')[0].strip()
+            types = comment.split()
+            if types:
+                self.function_signatures[func_name] = {
+                    'return_type': types[0],
+                    'param_types': types[1:]
+                }
+            return
+        
+        if comment.isdigit() or comment in self.HINT_TYPES:
+            target, equals, value = code.partition('=')
+            target = target.strip()
+            if equals and not value.startswith('=') and target.isidentifier():
+                is_list = value.lstrip().startswith('[')
+                if is_list or not comment.isdigit():
+                    self.comments[(scope, target)] = comment
+    
+    def convert_expression(self, expr, context=0):
+        """Convert Python expression to string representation
+        
+        Handlers return either a finished string or a list of strings and
+        (node, context) items, which are expanded from an explicit stack so long
+        operator chains never recurse. `context` is the precedence the enclosing
+        operator requires; handlers add parentheses when they bind more loosely.
+        """
+        if type(expr) is ast.List:
+            return self.convert_list(expr)
+        
+        handlers = self.EXPRESSION_HANDLERS
+        parts = []
+        stack = [(expr, context)]
+        visited = 0
+        while stack:
+            item = stack.pop()
+            if type(item) is str:
+                parts.append(item)
+                continue
             
-            if var_name in self.comments and self.comments[var_name].isdigit():
-                is_array = True
-                array_size = self.comments[var_name]
+            node, context = item
+            visited += 1
+            handler = handlers.get(type(node))
+            if handler is None:
+                parts.append(str(node))
+                continue
             
-            declare_elem = self.create_element("declare", 
-                                             name=var_name,
-                                             type=var_type,
-                                             array=str(is_array),
-                                             size=str(array_size))
-            parent.append(declare_elem)
+            result = handler(self, node, context)
+            if type(result) is str:
+                parts.append(result)
+            else:
+                stack.extend(reversed(result))
+        self.ast_nodes += visited
+        return "".join(parts)
+    
+    def parenthesize(self, items, precedence, context):
+        """Wrap expression items in parentheses when the context binds tighter"""
+        if precedence < context:
+            return ["(", *items, ")"]
+        return items
+    
+    @_handles(EXPRESSION_HANDLERS, ast.Constant)
+    def convert_constant(self, expr, context):
+        if isinstance(expr.value, str):
+            return f'"{expr.value}"'
+        text = str(expr.value)
+        if isinstance(expr.value, (int, float)) and expr.value < 0 and context > self.PREC_UNARY:
+            return f"({text})"
+        return text
+    
+    @_handles(EXPRESSION_HANDLERS, ast.Name)
+    def convert_name(self, expr, context):
+        return expr.id
+    
+    @_handles(EXPRESSION_HANDLERS, ast.Subscript)
+    def convert_subscript(self, expr, context):
+        return [(expr.value, self.PREC_ATOM), "[", (expr.slice, 0), "]"]
+    
+    @_handles(EXPRESSION_HANDLERS, ast.BinOp)
+    def convert_binop(self, expr, context):
+        op_type = type(expr.op)
+        op = self.BINOP_SYMBOLS.get(op_type, '?')
+        precedence = self.BINOP_PRECEDENCE.get(op_type, self.PREC_ADD)
+        left_context = precedence + 1 if op_type is ast.Pow else precedence
+        items = [(expr.left, left_context), f" {op} ", (expr.right, precedence + 1)]
+        return self.parenthesize(items, precedence, context)
+    
+    @_handles(EXPRESSION_HANDLERS, ast.UnaryOp)
+    def convert_unaryop(self, expr, context):
+        op = self.UNARYOP_SYMBOLS.get(type(expr.op), '?')
+        items = [op, (expr.operand, self.PREC_ATOM)]
+        return self.parenthesize(items, self.PREC_UNARY, context)
+    
+    @_handles(EXPRESSION_HANDLERS, ast.Compare)
+    def convert_compare(self, expr, context):
+        items = []
+        left = expr.left
+        for i, (op, comp) in enumerate(zip(expr.ops, expr.comparators)):
+            op_str = self.COMPARE_SYMBOLS.get(type(op), '==')
+            if i > 0:
+                items.append(" and ")
+            items.extend([(left, self.PREC_COMPARE + 1), f" {op_str} ", (comp, self.PREC_COMPARE + 1)])
+            left = comp
+        precedence = self.PREC_COMPARE if len(expr.ops) == 1 else self.PREC_AND
+        return self.parenthesize(items, precedence, context)
+    
+    @_handles(EXPRESSION_HANDLERS, ast.BoolOp)
+    def convert_boolop(self, expr, context):
+        if isinstance(expr.op, ast.And):
+            separator, precedence = " and ", self.PREC_AND
+        else:
+            separator, precedence = " or ", self.PREC_OR
+        items = []
+        for i, value in enumerate(expr.values):
+            if i > 0:
+                items.append(separator)
+            items.append((value, precedence + 1))
+        return self.parenthesize(items, precedence, context)
+    
+    @_handles(EXPRESSION_HANDLERS, ast.Call)
+    def convert_call(self, expr, context):
+        if isinstance(expr.func, ast.Name):
+            if expr.func.id in ('input', 'print'):
+                if expr.args:
+                    return [(expr.args[0], context)]
+                return '""'
+            elif expr.func.id == 'Size':
+                if expr.args:
+                    return ["Size(", (expr.args[0], 0), ")"]
+                return "Size()"
+            elif expr.func.id in ['int', 'float', 'str']:
+                if expr.args:
+                    return [(expr.args[0], context)]
+            else:
+                items = [f"{expr.func.id}("]
+                for i, arg in enumerate(expr.args):
+                    if i > 0:
+                        items.append(", ")
+                    items.append((arg, 0))
+                items.append(")")
+                return items
+        return "function_call"
+    
+    def convert_list(self, expr):
+        return [self.convert_expression(elem) for elem in expr.elts]
+    
+    def declare_variable(self, var_name, var_type="Integer"):
+        """Declare a variable the symbol table does not know, such as a generated loop counter
+        
+        Like every other declaration it ends up at the top of the function.
+        """
+        if var_name not in self.variables:
+            self.declarations.append(ir.Declare(var_name, var_type))
             self.variables[var_name] = var_type
     
     def evaluate_expression_value(self, expr):
@@ -244,254 +501,404 @@ class PythonToFlowgorithmConverter:
                         return left_val * right_val
                     elif isinstance(expr.op, ast.Div):
                         return left_val / right_val if right_val != 0 else None
-        except:
+        except (TypeError, ValueError, ArithmeticError, MemoryError):
             pass
         return None
     
     def convert_statements(self, statements, parent):
-        """Convert list of Python statements to Flowgorithm elements"""
+        """Lower a list of Python statements to IR nodes appended to parent
+        
+        Nested bodies are scheduled by handlers through convert_body and processed
+        depth-first from an explicit stack, so deep nesting never recurses. The AST
+        node and element budgets are checked after every statement.
+        """
         if not statements:
             return
-            
-        for stmt in statements:
-            element = None
-            
-            if isinstance(stmt, ast.FunctionDef):
+        
+        handlers = self.STATEMENT_HANDLERS
+        stack = [(iter(statements), parent, 0)]
+        while stack:
+            remaining, parent, depth = stack[-1]
+            stmt = next(remaining, None)
+            if stmt is None:
+                stack.pop()
                 continue
-                
-            elif isinstance(stmt, ast.Return):
+            
+            handler = handlers.get(type(stmt))
+            if handler is None:
                 continue
+            
+            size = len(parent)
+            node = handler(self, stmt, parent)
+            if node is not None:
+                parent.append(node)
+            self.ast_nodes += 1
+            self.elements += len(parent) - size
+            if self.ast_nodes > self.ast_node_budget or self.elements > self.element_budget:
+                self.check_budgets(stmt)
+            
+            if self.nested_bodies:
+                bodies = self.nested_bodies
+                self.nested_bodies = []
+                if depth + 1 > self.depth_budget:
+                    self.exceed_budget("E201", f"Nesting depth exceeds the limit of {self.max_depth}", stmt)
+                for body, container in reversed(bodies):
+                    if body:
+                        stack.append((iter(body), container, depth + 1))
+    
+    def convert_body(self, statements, container):
+        """Schedule a nested statement list to be lowered into the container list"""
+        self.nested_bodies.append((statements, container))
+    
+    @_handles(STATEMENT_HANDLERS, ast.Assign)
+    def convert_assign(self, stmt, parent):
+        if len(stmt.targets) != 1:
+            return None
+        target = stmt.targets[0]
+        
+        if isinstance(target, ast.Subscript):
+            array_name = self.convert_expression(target.value)
+            index = self.convert_expression(target.slice)
+            value = self.convert_expression(stmt.value)
+            
+            return ir.Assign(f"{array_name}[{index}]", value, stmt.value)
+        
+        if not isinstance(target, ast.Name):
+            return None
+        
+        var_name = target.id
+        
+        call = input_call(stmt.value)
+        if call is not None:
+            prompt = self.convert_expression(call.args[0]) if call.args else '""'
+            parent.append(ir.Output(prompt))
+            return ir.Input(var_name)
+        
+        if isinstance(stmt.value, ast.List):
+            self.convert_list_assign(stmt, var_name, parent)
+            return None
+        
+        if isinstance(stmt.value, ast.IfExp):
+            return self.convert_conditional_assign(stmt, target)
+        
+        return ir.Assign(var_name, self.convert_expression(stmt.value), stmt.value)
+    
+    def convert_list_assign(self, stmt, var_name, parent):
+        """Assign each element of a list literal to the array the symbol table declared"""
+        symbol = self.symbols.scope(self.scope).get(var_name)
+        elts = stmt.value.elts
+        array_size = int(symbol.size) if symbol is not None and symbol.size else len(elts)
+        
+        elts = elts[:array_size]
+        if self.array_threshold and len(elts) >= self.array_threshold:
+            self.convert_compact_list(elts, var_name, parent)
+            return
+        
+        for i, elem in enumerate(elts):
+            parent.append(ir.Assign(f"{var_name}[{i}]", self.convert_expression(elem)))
+    
+    def convert_compact_list(self, elts, var_name, parent):
+        """Initialize a large array literal with a few loops instead of one assign per element
+        
+        Runs of equal values or arithmetic progressions become a single for loop.
+        Remaining integer constants are packed into string chunks, one character per
+        value, and decoded in a loop with ToCode(Char(...)). Anything else is
+        assigned element by element.
+        """
+        self.ast_nodes += len(elts)
+        values = [self.evaluate_expression_value(elem) for elem in elts]
+        chunk = []
+        i = 0
+        while i < len(values):
+            length, step = self.find_array_run(values, i)
+            if length >= self.MIN_ARRAY_RUN:
+                self.emit_array_chunk(chunk, var_name, elts, parent, values)
+                chunk = []
                 
-            elif isinstance(stmt, ast.Assign):
-                if len(stmt.targets) == 1:
-                    target = stmt.targets[0]
-                    
-                    if isinstance(target, ast.Subscript):
-                        array_name = self.convert_expression(target.value)
-                        index = self.convert_expression(target.slice)
-                        value = self.convert_expression(stmt.value)
-                        
-                        element = self.create_element("assign",
-                                                    variable=f"{array_name}[{index}]",
-                                                    expression=value)
-                    
-                    elif isinstance(target, ast.Name):
-                        var_name = target.id
-                        
-                        if isinstance(stmt.value, ast.Call) and isinstance(stmt.value.func, ast.Name) and stmt.value.func.id == 'input':
-                            prompt = self.convert_expression(stmt.value.args[0]) if stmt.value.args else '""'
-                            
-                            var_type = self.get_variable_type(var_name, "String")
-                            
-                            output_elem = self.create_element("output", expression=prompt, newline="True")
-                            parent.append(output_elem)
-                            
-                            self.declare_variable(parent, var_name, var_type)
-                            
-                            input_elem = self.create_element("input", variable=var_name)
-                            parent.append(input_elem)
-                            
-                            continue
-                        
-                        elif isinstance(stmt.value, ast.List):
-                            list_elements = self.convert_expression(stmt.value)
-                            
-                            array_size = len(list_elements)
-                            if var_name in self.comments and self.comments[var_name].isdigit():
-                                array_size = int(self.comments[var_name])
-                            
-                            if list_elements:
-                                first_elem = stmt.value.elts[0]
-                                if isinstance(first_elem, ast.Constant):
-                                    if isinstance(first_elem.value, str):
-                                        array_type = "String"
-                                    elif isinstance(first_elem.value, float):
-                                        array_type = "Real"
-                                    elif isinstance(first_elem.value, bool):
-                                        array_type = "Boolean"
-                                    else:
-                                        array_type = "Integer"
-                                else:
-                                    array_type = "Integer"
-                            else:
-                                array_type = "Integer"
-                            
-                            self.declare_variable(parent, var_name, array_type, is_array=True, array_size=str(array_size))
-                            
-                            for i, elem_value in enumerate(list_elements):
-                                if i < array_size:
-                                    assign_elem = self.create_element("assign",
-                                                                    variable=f"{var_name}[{i}]",
-                                                                    expression=elem_value)
-                                    parent.append(assign_elem)
-                            
-                            continue
-                        else:
-                            if isinstance(stmt.value, ast.Constant):
-                                if isinstance(stmt.value.value, str):
-                                    default_type = "String"
-                                elif isinstance(stmt.value.value, (int, float)):
-                                    default_type = "Integer" if isinstance(stmt.value.value, int) else "Real"
-                                else:
-                                    default_type = "String"
-                            else:
-                                default_type = "Integer"
-                            
-                            self.declare_variable(parent, var_name, default_type)
-                            element = self.create_element("assign", 
-                                                        variable=var_name,
-                                                        expression=self.convert_expression(stmt.value))
-                    
-            elif isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Call):
-                if isinstance(stmt.value.func, ast.Name):
-                    if stmt.value.func.id == 'print':
-                        output_text = '""'
-                        if stmt.value.args:
-                            output_text = self.convert_expression(stmt.value.args[0])
-                        
-                        element = self.create_element("output", 
-                                                    expression=output_text,
-                                                    newline="True")
-                    else:
-                        func_name = stmt.value.func.id
-                        args = [self.convert_expression(arg) for arg in stmt.value.args]
-                        call_expr = f"{func_name}({', '.join(args)})"
-                        
-                        if func_name in self.function_signatures:
-                            sig = self.function_signatures[func_name]
-                            if sig['return_type'] == 'void':
-                                element = self.create_element("call", expression=call_expr)
-                            else:
-                                element = self.create_element("call", expression=call_expr)
-                        else:
-                            element = self.create_element("call", expression=call_expr)
-                    
-            elif isinstance(stmt, ast.If):
-                condition = self.convert_condition(stmt.test)
-                element = self.create_element("if", expression=condition)
-                
-                then_elem = self.create_element("then")
-                element.append(then_elem)
-                self.convert_statements(stmt.body, then_elem)
-                
-                else_elem = self.create_element("else")
-                element.append(else_elem)
-                if stmt.orelse:
-                    self.convert_statements(stmt.orelse, else_elem)
-                    
-            elif isinstance(stmt, ast.While):
-                condition = self.convert_condition(stmt.test)
-                element = self.create_element("while", expression=condition)
-                
-                self.convert_statements(stmt.body, element)
-                
-            elif isinstance(stmt, ast.For):
-                if isinstance(stmt.iter, ast.Call) and isinstance(stmt.iter.func, ast.Name):
-                    if stmt.iter.func.id == 'range':
-                        start, end, step = 0, 10, 1
-                        
-                        if len(stmt.iter.args) == 1:
-                            end = self.convert_expression(stmt.iter.args[0])
-                        elif len(stmt.iter.args) == 2:
-                            start = self.convert_expression(stmt.iter.args[0])
-                            end = self.convert_expression(stmt.iter.args[1])
-                        elif len(stmt.iter.args) == 3:
-                            start = self.convert_expression(stmt.iter.args[0])
-                            end = self.convert_expression(stmt.iter.args[1])
-                            step = self.convert_expression(stmt.iter.args[2])
-                        
-                        if isinstance(stmt.target, ast.Name):
-                            var_name = stmt.target.id
-                            var_type = self.get_variable_type(var_name, "Integer")
-                            self.declare_variable(parent, var_name, var_type)
-                            
-                            direction = "inc"  
-                            
-                            start_val = self.evaluate_expression_value(stmt.iter.args[0] if len(stmt.iter.args) >= 2 else ast.Constant(value=0))
-                            end_val = self.evaluate_expression_value(stmt.iter.args[1] if len(stmt.iter.args) >= 2 else stmt.iter.args[0])
-                            step_val = self.evaluate_expression_value(stmt.iter.args[2] if len(stmt.iter.args) == 3 else ast.Constant(value=1))
-                            
-                            if step_val is not None and step_val < 0:
-                                direction = "dec"
-                            elif start_val is not None and end_val is not None:
-                                if start_val > end_val:
-                                    direction = "dec"
-                                else:
-                                    direction = "inc"
-                            
-                            if step_val is not None and step_val < 0:
-                                step = str(abs(step_val))
-                                direction = "dec"
-                            else:
-                                step = str(step_val) if step_val is not None else step
-                            
-                            element = self.create_element("for",
-                                                        variable=var_name,
-                                                        start=str(start),
-                                                        end=str(end),
-                                                        direction=direction,
-                                                        step=str(step))
-                            
-                            self.convert_statements(stmt.body, element)
-                    else:
-                        print(f"Warning: For loop over {stmt.iter.func.id} not fully supported, converting to while loop")
-                        condition = "True"  
-                        element = self.create_element("while", expression=condition)
-                        self.convert_statements(stmt.body, element)
+                index_var = self.get_index_variable(var_name, parent)
+                if step is None or step == 0:
+                    expression = self.convert_expression(elts[i])
                 else:
-                    print("Warning: For loop over non-range iterable not fully supported, converting to while loop")
-                    condition = "True"
-                    element = self.create_element("while", expression=condition)
-                    self.convert_statements(stmt.body, element)
+                    expression = self.progression_expression(index_var, values[i] - step * i, step)
+                self.emit_array_loop(var_name, index_var, i, i + length - 1, expression, parent)
+                i += length
+                continue
             
-            if element is not None:
-                parent.append(element)
-    
-    def find_return_variable(self, func_body):
-        """Find the variable name that gets returned in a function"""
-        for stmt in func_body:
-            if isinstance(stmt, ast.Return) and stmt.value:
-                if isinstance(stmt.value, ast.Name):
-                    return stmt.value.id
-        return None
+            if self.is_plain_int(values[i]):
+                if chunk:
+                    low, high = min(low, values[i]), max(high, values[i])
+                if chunk and (len(chunk) >= self.ARRAY_CHUNK_SIZE or high - low > self.ARRAY_CHUNK_SPAN):
+                    self.emit_array_chunk(chunk, var_name, elts, parent, values)
+                    chunk = []
+                if not chunk:
+                    low = high = values[i]
+                chunk.append(i)
+            else:
+                self.emit_array_chunk(chunk, var_name, elts, parent, values)
+                chunk = []
+                parent.append(ir.Assign(f"{var_name}[{i}]", self.convert_expression(elts[i])))
+            i += 1
+        self.emit_array_chunk(chunk, var_name, elts, parent, values)
     
-    def convert_function(self, func_def, root):
-        """Convert a Python function definition to Flowgorithm function"""
-        func_name = func_def.name
+    def is_plain_int(self, value):
+        return type(value) is int
+    
+    def find_array_run(self, values, start):
+        """Return (length, step) of the equal-valued or arithmetic run starting at start"""
+        first = values[start]
+        if first is None or start + 1 >= len(values) or values[start + 1] is None:
+            return 1, None
         
-        return_type = "None"
-        param_types = []
+        end = start + 1
+        if self.is_plain_int(first) and self.is_plain_int(values[end]):
+            step = values[end] - first
+            while (end + 1 < len(values) and self.is_plain_int(values[end + 1])
+                   and values[end + 1] - values[end] == step):
+                end += 1
+            return end - start + 1, step
         
-        if func_name in self.function_signatures:
-            sig = self.function_signatures[func_name]
-            return_type = self.convert_type_to_flowgorithm(sig['return_type'])
-            param_types = [self.convert_type_to_flowgorithm(t) for t in sig['param_types']]
+        while end < len(values) and type(values[end]) is type(first) and values[end] == first:
+            end += 1
+        return end - start, None
+    
+    def progression_expression(self, index_var, base, step):
+        """Return the expression for base + index * step"""
+        term = index_var if abs(step) == 1 else f"{index_var} * {abs(step)}"
+        if step < 0:
+            return f"{base} - {term}"
+        if base > 0:
+            return f"{term} + {base}"
+        if base < 0:
+            return f"{term} - {-base}"
+        return term
+    
+    def get_index_variable(self, var_name, parent):
+        """Declare and return the Integer loop counter used to initialize an array
         
-        return_variable = ""
-        if return_type != "None":
-            return_variable = self.find_return_variable(func_def.body)
-            if return_variable is None:
-                return_variable = "result"
+        Only counters generated earlier in the scope are reused; any other name in
+        the scope belongs to the program.
+        """
+        index_var = f"{var_name}Index"
+        suffix = 1
+        while index_var in self.variables and index_var not in self.counters:
+            suffix += 1
+            index_var = f"{var_name}Index{suffix}"
+        self.counters.add(index_var)
+        self.declare_variable(index_var)
+        return index_var
+    
+    def emit_array_loop(self, var_name, index_var, start, end, expression, parent):
+        loop = ir.For(index_var, start, end)
+        loop.body.append(ir.Assign(f"{var_name}[{index_var}]", expression))
+        parent.append(loop)
+    
+    def emit_array_chunk(self, chunk, var_name, elts, parent, values):
+        """Emit pending integer constants as one decoding loop, or singly if too few"""
+        if len(chunk) < self.MIN_ARRAY_RUN:
+            for i in chunk:
+                parent.append(ir.Assign(f"{var_name}[{i}]", self.convert_expression(elts[i])))
+            return
         
-        func_elem = ET.SubElement(root, "function",
-                                 name=func_name,
-                                 type=return_type,
-                                 variable=return_variable)
+        start = chunk[0]
+        offset = self.ARRAY_CHUNK_BASE - min(values[i] for i in chunk)
+        encoded = "".join(chr(values[i] + offset) for i in chunk)
+        index_var = self.get_index_variable(var_name, parent)
+        position = index_var if start == 0 else f"{index_var} - {start}"
+        decode = f'ToCode(Char("{encoded}", {position}))'
+        if offset > 0:
+            expression = f"{decode} - {offset}"
+        elif offset < 0:
+            expression = f"{decode} + {-offset}"
+        else:
+            expression = decode
+        self.emit_array_loop(var_name, index_var, start, start + len(chunk) - 1, expression, parent)
+    
+    def convert_conditional_assign(self, stmt, target):
+        """Lower `x = a if cond else b` to an if element assigning each branch"""
+        node = ir.If(self.convert_condition(stmt.value.test), stmt.value.test)
+        for branch, value in ((node.then, stmt.value.body), (node.orelse, stmt.value.orelse)):
+            branch_stmt = ast.copy_location(ast.Assign(targets=[target], value=value), stmt)
+            self.convert_body([branch_stmt], branch)
+        return node
+    
+    @_handles(STATEMENT_HANDLERS, ast.AugAssign)
+    def convert_aug_assign(self, stmt, parent):
+        if not isinstance(stmt.target, (ast.Name, ast.Subscript)):
+            return None
+        value = ast.BinOp(left=stmt.target, op=stmt.op, right=stmt.value)
+        return ir.Assign(self.convert_expression(stmt.target), self.convert_expression(value), value)
+    
+    @_handles(STATEMENT_HANDLERS, ast.Expr)
+    def convert_expr_statement(self, stmt, parent):
+        if not isinstance(stmt.value, ast.Call) or not isinstance(stmt.value.func, ast.Name):
+            return None
         
-        params_elem = ET.SubElement(func_elem, "parameters")
-        for i, param in enumerate(func_def.args.args):
-            param_type = param_types[i] if i < len(param_types) else "Integer"
-            ET.SubElement(params_elem, "parameter",
-                         name=param.arg,
-                         type=param_type,
-                         array="False")
+        if stmt.value.func.id == 'print':
+            if not stmt.value.args:
+                return ir.Output('""')
+            
+            output_value = stmt.value.args[0]
+            return ir.Output(self.convert_expression(output_value), source=output_value)
         
-        body_elem = ET.SubElement(func_elem, "body")
+        func_name = stmt.value.func.id
+        args = [self.convert_expression(arg) for arg in stmt.value.args]
+        call_expr = f"{func_name}({', '.join(args)})"
+        return ir.Call(call_expr)
+    
+    @_handles(STATEMENT_HANDLERS, ast.If)
+    def convert_if(self, stmt, parent):
+        node = ir.If(self.convert_condition(stmt.test), stmt.test)
+        self.convert_body(stmt.body, node.then)
+        if stmt.orelse:
+            self.convert_body(stmt.orelse, node.orelse)
+        return node
+    
+    @_handles(STATEMENT_HANDLERS, ast.While)
+    def convert_while(self, stmt, parent):
+        node = ir.While(self.convert_condition(stmt.test), stmt.test)
+        self.convert_body(stmt.body, node.body)
+        return node
+    
+    @_handles(STATEMENT_HANDLERS, ast.For)
+    def convert_for(self, stmt, parent):
+        if not (isinstance(stmt.iter, ast.Call) and isinstance(stmt.iter.func, ast.Name)):
+            self.report(ERROR, "E101", "For loop over a non-range iterable is not supported, "
+                                       "converting to an endless while loop", stmt)
+            return self.convert_unsupported_for(stmt)
         
-        if return_type != "None" and return_variable:
-            pass
+        if stmt.iter.func.id != 'range':
+            self.report(ERROR, "E102", f"For loop over {stmt.iter.func.id}() is not supported, "
+                                       "converting to an endless while loop", stmt)
+            return self.convert_unsupported_for(stmt)
+        
+        start, end, step = 0, 10, 1
+        
+        if len(stmt.iter.args) == 1:
+            end = self.convert_expression(stmt.iter.args[0])
+        elif len(stmt.iter.args) == 2:
+            start = self.convert_expression(stmt.iter.args[0])
+            end = self.convert_expression(stmt.iter.args[1])
+        elif len(stmt.iter.args) == 3:
+            start = self.convert_expression(stmt.iter.args[0])
+            end = self.convert_expression(stmt.iter.args[1])
+            step = self.convert_expression(stmt.iter.args[2])
+        
+        if not isinstance(stmt.target, ast.Name):
+            return None
+        
+        var_name = stmt.target.id
+        direction = "inc"
+        
+        start_val = self.evaluate_expression_value(stmt.iter.args[0] if len(stmt.iter.args) >= 2 else ast.Constant(value=0))
+        end_val = self.evaluate_expression_value(stmt.iter.args[1] if len(stmt.iter.args) >= 2 else stmt.iter.args[0])
+        step_val = self.evaluate_expression_value(stmt.iter.args[2] if len(stmt.iter.args) == 3 else ast.Constant(value=1))
+        
+        if step_val is not None and step_val < 0:
+            direction = "dec"
+        elif start_val is not None and end_val is not None:
+            if start_val > end_val:
+                direction = "dec"
+            else:
+                direction = "inc"
+        
+        if step_val is not None and step_val < 0:
+            step = str(abs(step_val))
+            direction = "dec"
+        else:
+            step = str(step_val) if step_val is not None else step
+        
+        node = ir.For(var_name, start, end, direction, step)
+        self.convert_body(stmt.body, node.body)
+        return node
+    
+    def convert_unsupported_for(self, stmt):
+        """Fall back to a while loop for iterables Flowgorithm cannot express"""
+        node = ir.While("True")
+        self.convert_body(stmt.body, node.body)
+        return node
+    
+    def enter_scope(self, name):
+        """Load the symbols of a function, or of Main for None, and declare them up front"""
+        scope = self.symbols.scope(name)
+        self.scope = name
+        self.variables = scope.types()
+        self.counters = set()
+        self.declarations = [ir.Declare(symbol.name, symbol.type, symbol.array, symbol.size)
+                             for symbol in scope.declarations()]
+        return scope
+    
+    def convert_function(self, func_def, root=None):
+        """Convert a Python function definition to Flowgorithm function
+        
+        Parameter, return and variable types come from the function's scope in the
+        symbol table, so analyze() must have run on the module.
+        """
+        scope = self.enter_scope(func_def.name)
+        function = ir.Function(func_def.name, scope.return_type, scope.return_variable)
+        for symbol in scope.parameters():
+            function.parameters.append(ir.Parameter(symbol.name, symbol.type))
+        
+        try:
+            self.convert_statements(func_def.body, function.body)
+        finally:
+            self.scope = None
+        function.body[:0] = self.declarations
+        if self.optimize:
+            self.optimize_body(function.body)
+        
+        if root is not None:
+            root.functions.append(function)
+        return function
+    
+    def convert_functions(self, functions):
+        """Convert top-level functions, in a process pool when function_jobs > 1"""
+        if self.function_jobs > 1 and len(functions) > 1:
+            return self.convert_functions_parallel(functions)
+        
+        elements = []
+        for func_def in functions:
+            with self.stage("convert_function", func_def.name):
+                elements.append(self.convert_function(func_def))
+        return elements
+    
+    def convert_functions_parallel(self, functions):
+        """Convert ranges of functions in worker processes and merge them in source order
+        
+        Workers receive the parsed functions once through the pool initializer (for
+        free under fork) and return flattened IR records, which are much cheaper to
+        move between processes than pickled AST nodes or nested trees. Diagnostics
+        from the workers are merged in source order.
+        """
+        worker = self.new_converter()
+        worker.source_name = self.source_name
+        worker.function_jobs = 1
+        worker.profile = None
+        worker.function_signatures = self.function_signatures
+        worker.symbols = self.symbols
+        worker.comments = self.comments
+        worker.hints = self.hints
+        
+        workers = min(self.function_jobs, len(functions))
+        size = -(-len(functions) // (workers * 4))
+        starts = range(0, len(functions), size)
+        stops = [start + size for start in starts]
         
-        self.convert_statements(func_def.body, body_elem)
+        from concurrent.futures import ProcessPoolExecutor
+        elements = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_function_worker,
+                                 initargs=(worker, functions)) as pool:
+            results = pool.map(_convert_function_range, starts, stops, repeat(self.profile is not None))
+            for serialized, profile_data, diagnostics, error, ast_nodes in results:
+                self.diagnostics.extend(diagnostics)
+                if error is not None:
+                    raise ConversionError(error)
+                self.ast_nodes += ast_nodes
+                self.elements += sum(len(records) for records in serialized)
+                self.check_budgets()
+                elements.extend(ir.unflatten(records) for records in serialized)
+                if profile_data is not None:
+                    self.profile.merge(profile_data)
+        return elements
     
     def convert_condition(self, test):
         """Convert if test condition, handling nested ifs"""
@@ -504,18 +911,76 @@ class PythonToFlowgorithmConverter:
         else:
             return self.convert_expression(test)
     
-    def convert_file(self, python_file, output_file=None):
-        """Convert Python file to Flowgorithm format"""
-        if not os.path.exists(python_file):
-            print(f"Error: File '{python_file}' not found")
-            return False
-        
-        tree = self.parse_python_file(python_file)
-        if tree is None:
-            return False
+    def optimize_body(self, body):
+        """Fold constant expressions and drop branches whose condition is constant"""
+        stack = [body]
+        while stack:
+            nodes = stack.pop()
+            pending = nodes[::-1]
+            kept = []
+            while pending:
+                node = pending.pop()
+                value = None
+                if isinstance(node, (ir.If, ir.While)) and node.source is not None:
+                    value = self.evaluate_expression_value(node.source)
+                if value is not None and (isinstance(node, ir.If) or not value):
+                    if isinstance(node, ir.If):
+                        pending.extend(reversed(node.then if value else node.orelse))
+                    continue
+                
+                self.fold_constants(node)
+                kept.append(node)
+                for slot, _ in node.blocks:
+                    stack.append(getattr(node, slot))
+            nodes[:] = kept
+    
+    def fold_constants(self, node):
+        """Replace a numeric constant expression such as 60 * 60 with its value"""
+        source = getattr(node, 'source', None)
+        if source is None or isinstance(source, ast.Constant):
+            return
+        value = self.evaluate_expression_value(source)
+        if type(value) in (int, float):
+            node.expression = self.convert_expression(ast.Constant(value=value))
+    
+    def write_xml(self, root, stream):
+        """Stream the IR tree to a text file handle in a single pass
         
-        root = self.create_flowgorithm_xml(python_file)
+        Aborts with a diagnostic once the output grows past max_output_bytes.
+        """
+        try:
+            ir.write_xml(root, stream, self.compact, self.max_output_bytes)
+        except ir.OutputLimitExceeded:
+            self.exceed_budget("E205", f"Output is larger than {self.max_output_bytes} bytes")
+    
+    def get_options(self):
+        """Return the picklable constructor options of this converter"""
+        return {
+            'compact': self.compact,
+            'source_date_epoch': self.source_date_epoch,
+            'max_depth': self.max_depth,
+            'function_jobs': self.function_jobs,
+            'array_threshold': self.array_threshold,
+            'optimize': self.optimize,
+            'fail_fast': self.fail_fast,
+            'max_source_bytes': self.max_source_bytes,
+            'max_ast_nodes': self.max_ast_nodes,
+            'max_elements': self.max_elements,
+            'max_output_bytes': self.max_output_bytes,
+        }
+    
+    def new_converter(self, diagnostics=None):
+        """Return a converter with the same options and no conversion state
         
+        It reports into `diagnostics` if given, otherwise into a collector of its own,
+        so a long-lived converter keeps no diagnostics from the calls it served.
+        """
+        if diagnostics is None:
+            diagnostics = DiagnosticCollector()
+        return type(self)(cache=self.cache, profile=self.profile, diagnostics=diagnostics, **self.get_options())
+    
+    def split_module(self, tree):
+        """Separate top-level function definitions from the Main statements"""
         functions = []
         main_statements = []
         
@@ -524,51 +989,274 @@ class PythonToFlowgorithmConverter:
                 functions.append(stmt)
             else:
                 main_statements.append(stmt)
+        return functions, main_statements
+    
+    def convert_main(self, main_statements):
+        """Convert the module-level statements into the Main function"""
+        main_func = ir.Function("Main")
         
-        for func_def in functions:
-            self.convert_function(func_def, root)
+        self.enter_scope(None)
+        with self.stage("convert_main"):
+            self.convert_statements(main_statements, main_func.body)
+            main_func.body[:0] = self.declarations
+            if self.optimize:
+                self.optimize_body(main_func.body)
+        return main_func
+    
+    def analyze(self, tree):
+        """Build the symbol table of a parsed module; hint comments must be extracted first"""
+        with self.stage("analyze"):
+            self.symbols = SymbolTable(self.comments, self.hints, self.function_signatures).build(tree)
+    
+    def build_tree(self, tree, python_file):
+        """Convert a parsed module into the Flowgorithm IR tree"""
+        root = self.create_program(python_file)
         
-        main_func = ET.SubElement(root, "function", 
-                                 name="Main", 
-                                 type="None", 
-                                 variable="")
+        functions, main_statements = self.split_module(tree)
+        self.analyze(tree)
         
-        ET.SubElement(main_func, "parameters")
+        root.functions.extend(self.convert_functions(functions))
         
-        body = ET.SubElement(main_func, "body")
+        root.functions.append(self.convert_main(main_statements))
         
-        self.convert_statements(main_statements, body)
+        if self.profile is not None:
+            self.profile.count_elements(root)
+        return root
+    
+    def convert_source(self, source, name="program", tree=None, diagnostics=None):
+        """Convert Python source text to .fprg bytes without touching the filesystem
+        
+        Every call runs on a fresh converter, so one instance can serve concurrent
+        callers. Pass `tree` to reuse an already parsed ast.Module; `source` is still
+        used for hint comments and may be None when there are none. Diagnostics go to
+        the `diagnostics` collector if given and are dropped otherwise; a syntax error
+        is reported and re-raised,
+        and a source ast.parse rejects otherwise raises ConversionError.
+        """
+        converter = self.new_converter(diagnostics)
+        converter.source_name = name
+        if source is not None and converter.max_source_bytes is not None:
+            converter.check_source_size(len(source.encode('utf-8')))
+        if tree is None:
+            try:
+                with self.stage("parse"):
+                    tree = ast.parse(source, filename=name)
+            except SyntaxError as e:
+                converter.diagnostics.add(Diagnostic(ERROR, "E002", f"Syntax error: {e.msg}",
+                                                     e.lineno, e.offset, name))
+                raise
+            except (RecursionError, MemoryError, ValueError) as e:
+                raise ConversionError(str(converter.report_unparseable(e))) from e
+        if source is not None:
+            with self.stage("extract_comments"):
+                converter.extract_comments(source, tree)
+        
+        root = converter.build_tree(tree, name)
+        
+        buffer = io.StringIO()
+        with self.stage("serialization"):
+            converter.write_xml(root, buffer)
+        return buffer.getvalue().encode('utf-8')
+    
+    def convert_file(self, python_file, output_file=None):
+        """Convert Python file to Flowgorithm format
+        
+        Problems are reported to the diagnostics collector; returns whether a file was written.
+        """
+        converter = self.new_converter(self.diagnostics)
+        converter.source_name = python_file
+        if not os.path.exists(python_file):
+            converter.report(ERROR, "E001", f"File '{python_file}' not found")
+            return False
         
         if output_file is None:
             base_name = os.path.splitext(python_file)[0]
             output_file = f"{base_name}.fprg"
         
-        rough_string = ET.tostring(root, 'unicode')
-        reparsed = minidom.parseString(rough_string)
-        pretty_xml = reparsed.toprettyxml(indent="    ")
+        cache_key = None
+        if self.cache is not None:
+            try:
+                with open(python_file, 'rb') as f:
+                    # Check the size first so an oversized source is neither read nor served from the cache
+                    converter.check_source_size(os.fstat(f.fileno()).st_size)
+                    cache_key = self.cache.key(f.read(), self.cache_options(python_file))
+            except ConversionError:
+                return False
+            except OSError as e:
+                converter.report(ERROR, "E004", f"Cannot read the source: {e}")
+                return False
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                try:
+                    with open(output_file, 'wb') as f:
+                        f.write(cached)
+                    print(f"Successfully converted '{python_file}' to '{output_file}' (cached)")
+                    return True
+                except OSError as e:
+                    converter.report(ERROR, "E003", f"Cannot write '{output_file}': {e}")
+                    return False
         
-        lines = [line for line in pretty_xml.split('\n') if line.strip()]
-        final_xml = '\n'.join(lines)
+        reported = len(self.diagnostics.diagnostics)
+        try:
+            tree = converter.parse_python_file(python_file)
+            if tree is None:
+                return False
+            root = converter.build_tree(tree, python_file)
+        except ConversionError:
+            return False
         
         try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(final_xml)
+            with open(output_file, 'w', encoding='utf-8') as f, self.stage("serialization"):
+                converter.write_xml(root, f)
+            # A cache hit reports nothing, so only conversions without diagnostics are stored
+            if cache_key is not None and len(self.diagnostics.diagnostics) == reported:
+                with open(output_file, 'rb') as f:
+                    self.cache.put(cache_key, f.read())
             print(f"Successfully converted '{python_file}' to '{output_file}'")
             return True
-        except Exception as e:
-            print(f"Error writing output file: {e}")
+        except OSError as e:
+            converter.report(ERROR, "E003", f"Cannot write '{output_file}': {e}")
+            return False
+        except ConversionError:
+            os.remove(output_file)
             return False
 
+_function_worker = None
+
+def _init_function_worker(converter, functions):
+    """Keep the converter state and parsed functions for this worker process"""
+    global _function_worker
+    _function_worker = (converter, functions)
+
+def _convert_function_range(start, stop, profiled):
+    """Convert functions[start:stop] in a worker process
+    
+    Returns the flattened subtrees, profile data, diagnostics, the message of a
+    ConversionError, which is re-raised in the parent after merging the diagnostics,
+    and the number of AST nodes converted, which the parent adds to its budget.
+    """
+    converter, functions = _function_worker
+    converter.profile = None
+    converter.diagnostics = DiagnosticCollector()
+    converter.ast_nodes = converter.elements = 0
+    if profiled:
+        from profiling import ConversionProfile
+        converter.profile = ConversionProfile()
+    
+    serialized, error = [], None
+    try:
+        elements = converter.convert_functions(functions[start:stop])
+        serialized = [ir.flatten(element) for element in elements]
+    except ConversionError as e:
+        error = str(e)
+    profile_data = converter.profile.to_dict() if profiled else None
+    return serialized, profile_data, converter.diagnostics.diagnostics, error, converter.ast_nodes
+
+def write_profile(profile, destination):
+    """Dump collected profiling data as JSON to a file, or to stderr for '-'"""
+    if destination == "-":
+        profile.dump(sys.stderr)
+    else:
+        with open(destination, 'w', encoding='utf-8') as f:
+            profile.dump(f)
+
+def open_diagnostics(destination):
+    """Return a collector that streams JSON lines to a file, or to stderr for '-'"""
+    if destination is None:
+        return DiagnosticCollector()
+    if destination == "-":
+        return DiagnosticCollector(sys.stderr)
+    return DiagnosticCollector(open(destination, 'w', encoding='utf-8'))
+
 def main():
     """Main function to handle command line usage"""
-    if len(sys.argv) < 2:
+    import argparse
+    parser = argparse.ArgumentParser(description="Convert Python files to Flowgorithm .fprg files")
+    parser.add_argument("input", nargs="?", help="Python file inside the input/ directory")
+    parser.add_argument("output", nargs="?", help="output .fprg name inside the output/ directory")
+    parser.add_argument("--batch", nargs="+", metavar="SOURCE",
+                        help="directories, globs or files to convert in parallel")
+    parser.add_argument("--watch", nargs="+", metavar="SOURCE",
+                        help="re-convert these files, directories or globs whenever they change")
+    parser.add_argument("--manifest", help="file listing one source path, directory or glob per line")
+    parser.add_argument("-o", "--output-dir", default="output", help="batch output directory (default: output)")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="number of worker processes for batch mode (default: CPU count)")
+    parser.add_argument("--archive", metavar="FILE",
+                        help="write all batch results and a manifest into one .zip or .tar[.gz|.bz2|.xz] "
+                             "file, or '-' for a tar stream on stdout")
+    parser.add_argument("--compact", action="store_true", help="write the .fprg without indentation")
+    parser.add_argument("--source-date-epoch", type=int, default=None,
+                        help="pin the saved/created timestamps for reproducible output "
+                             "(defaults to $SOURCE_DATE_EPOCH)")
+    parser.add_argument("--cache-dir", help="reuse earlier conversions stored in this directory")
+    parser.add_argument("--cache-size", type=int, default=256, help="cache size limit in MB (default: 256)")
+    parser.add_argument("--max-depth", type=int, default=1000,
+                        help="maximum statement nesting depth before conversion is aborted (default: 1000)")
+    parser.add_argument("--max-source-bytes", type=int, default=10000000,
+                        help="abort files larger than this (default: 10000000)")
+    parser.add_argument("--max-ast-nodes", type=int, default=5000000,
+                        help="abort sources with more AST nodes than this (default: 5000000)")
+    parser.add_argument("--max-elements", type=int, default=1000000,
+                        help="abort conversions emitting more flowchart elements than this (default: 1000000)")
+    parser.add_argument("--max-output-bytes", type=int, default=100000000,
+                        help="abort conversions writing more output than this (default: 100000000)")
+    parser.add_argument("--array-threshold", type=int, default=32,
+                        help="initialize list literals with at least this many elements using loops; 0 disables "
+                             "(default: 32)")
+    parser.add_argument("--optimize", action="store_true",
+                        help="fold constant expressions and remove branches whose condition is constant")
+    parser.add_argument("--function-jobs", type=int, default=1,
+                        help="convert the functions of one module in this many worker processes (default: 1)")
+    parser.add_argument("--profile", nargs="?", const="-", metavar="FILE",
+                        help="write per-stage timings and element counts as JSON to FILE (default: stderr)")
+    parser.add_argument("--fail-fast", action="store_true",
+                        help="abort a file at its first error instead of writing an unusable conversion")
+    parser.add_argument("--diagnostics-json", nargs="?", const="-", metavar="FILE",
+                        help="write errors and warnings as JSON lines to FILE (default: stderr)")
+    parser.add_argument("--serve", action="store_true",
+                        help="answer JSON-lines conversion requests on stdin (or --socket) until closed")
+    parser.add_argument("--socket", help="serve on this Unix socket path instead of stdin/stdout")
+    args = parser.parse_args()
+    options = {'compact': args.compact, 'source_date_epoch': args.source_date_epoch,
+               'max_depth': args.max_depth, 'function_jobs': args.function_jobs,
+               'array_threshold': args.array_threshold, 'optimize': args.optimize, 'fail_fast': args.fail_fast,
+               'max_source_bytes': args.max_source_bytes, 'max_ast_nodes': args.max_ast_nodes,
+               'max_elements': args.max_elements, 'max_output_bytes': args.max_output_bytes}
+
+    if args.serve or args.socket:
+        from server import serve
+        serve(socket_path=args.socket, jobs=args.jobs, options=dict(options))
+        return
+
+    if args.cache_dir:
+        from cache import ConversionCache
+        options['cache'] = ConversionCache(args.cache_dir, args.cache_size * 1024 * 1024)
+
+    if args.watch:
+        from batch import collect_sources
+        from watch import watch
+        watch(collect_sources(args.watch), args.output_dir, options=options)
+        return
+
+    if args.batch or args.manifest:
+        from batch import convert_batch
+        results = convert_batch(args.batch, args.output_dir, jobs=args.jobs,
+                                manifest=args.manifest, options=options, profile=args.profile,
+                                archive=args.archive, diagnostics=open_diagnostics(args.diagnostics_json))
+        if not results or not all(result['success'] for result in results):
+            sys.exit(1)
+        return
+
+    if args.input is None:
         print("Usage: python converter.py <input.py> [output.fprg]")
         print("Example: python converter.py hello.py")
         print("         python converter.py hello.py hello.fprg")
+        print("         python converter.py --batch submissions/ -o output -j 8")
         return
     
-    input_file = sys.argv[1]
-    output_file = sys.argv[2] if len(sys.argv) > 2 else None
+    input_file = args.input
+    output_file = args.output
     
     if output_file is None:
         base_name = os.path.splitext(os.path.basename(input_file))[0]
@@ -585,9 +1273,20 @@ def main():
     input_file = os.path.join(input_dir, input_file)
 
     
-    converter = PythonToFlowgorithmConverter()
+    if args.profile:
+        from profiling import ConversionProfile
+        options['profile'] = ConversionProfile()
+    
+    diagnostics = open_diagnostics(args.diagnostics_json)
+    converter = PythonToFlowgorithmConverter(diagnostics=diagnostics, **options)
     
     success = converter.convert_file(input_file, output_file)
+    if diagnostics.stream is None:
+        for diagnostic in diagnostics:
+            print(diagnostic)
+    
+    if args.profile:
+        write_profile(options['profile'], args.profile)
     
     if success:
         print("\nConversion completed successfully!")
@@ -0,0 +1,74 @@
+"""Structured errors and warnings reported while converting
+
+    E001  source file not found
+    E002  syntax error in the Python source
+    E003  output could not be written
+    E004  source could not be read
+    E101  for loop over a non-range iterable, emitted as an endless while loop
+    E102  for loop over a call other than range(), emitted as an endless while loop
+    E201  statements nested deeper than max_depth
+    E202  source larger than max_source_bytes
+    E203  more AST nodes than max_ast_nodes
+    E204  more flowchart elements than max_elements
+    E205  output larger than max_output_bytes
+    E301  conversion took longer than its timeout (async_converter)
+"""
+import threading
+
+ERROR = "error"
+WARNING = "warning"
+
+
+class Diagnostic:
+    """One reported problem; line and column are 1-based and None when unknown"""
+    __slots__ = ('severity', 'code', 'message', 'line', 'column', 'source')
+
+    def __init__(self, severity, code, message, line=None, column=None, source=None):
+        self.severity = severity
+        self.code = code
+        self.message = message
+        self.line = line
+        self.column = column
+        self.source = source
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __str__(self):
+        location = [str(part) for part in (self.source, self.line, self.column) if part is not None]
+        prefix = ":".join(location) + ": " if location else ""
+        return f"{prefix}{self.severity} {self.code}: {self.message}"
+
+
+class DiagnosticCollector:
+    """Buffer diagnostics from one or more conversions
+
+    With `stream` set, every diagnostic is also written to it as one JSON line as
+    soon as it is reported.
+    """
+
+    def __init__(self, stream=None):
+        self.diagnostics = []
+        self.stream = stream
+        self.lock = threading.Lock()
+
+    def add(self, diagnostic):
+        self.diagnostics.append(diagnostic)
+        if self.stream is not None:
+            import json
+            line = json.dumps(diagnostic.to_dict()) + "\n"
+            with self.lock:
+                self.stream.write(line)
+                self.stream.flush()
+        return diagnostic
+
+    def extend(self, diagnostics):
+        """Add diagnostics collected elsewhere, e.g. returned from a worker process"""
+        for diagnostic in diagnostics:
+            self.add(diagnostic)
+
+    def has_errors(self):
+        return any(diagnostic.severity == ERROR for diagnostic in self.diagnostics)
+
+    def __iter__(self):
+        return iter(self.diagnostics)
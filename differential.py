@@ -0,0 +1,193 @@
+"""Run Python sources and their converted flowcharts on the same input and compare output
+
+    python differential.py tests/*.py -j 8
+    python differential.py prog.py --input 3 --input 4
+
+Scripted input comes from a `<name>.in` file next to each source, one value per
+line, or from --input. Input prompts are printed on their own line on both sides,
+the way the converted flowchart shows them.
+"""
+import argparse
+import ast
+import builtins
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from batch import collect_sources
+from converter import ConversionError, PythonToFlowgorithmConverter
+from interpreter import INTRINSICS, ExecutionError, FlowchartProgram, _concat
+from workers import TimeLimitExceeded, time_limit
+
+
+class ConcatTransformer(ast.NodeTransformer):
+    """Rewrite `a & b` into a helper call, since the sources use & to join strings"""
+
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        if not isinstance(node.op, ast.BitAnd):
+            return node
+        return ast.copy_location(ast.Call(func=ast.Name(id='_concat', ctx=ast.Load()),
+                                          args=[node.left, node.right], keywords=[]), node)
+
+
+def _concat_or_and(a, b):
+    if isinstance(a, int) and isinstance(b, int):
+        return a & b
+    return _concat(a, b)
+
+
+def run_python(tree, name, inputs, timeout):
+    """Execute a parsed module with scripted input and return (output, error)"""
+    output = []
+    remaining = iter(inputs)
+
+    def scripted_input(prompt=""):
+        output.append(f"{prompt}\n")
+        text = next(remaining, None)
+        if text is None:
+            raise EOFError("the program asked for more input than was given")
+        return text
+
+    def captured_print(*args, sep=" ", end="\n", **kwargs):
+        output.append(sep.join(str(arg) for arg in args) + end)
+
+    namespace = {name: value for name, value in INTRINSICS.items() if not hasattr(builtins, name)}
+    namespace.update({'__name__': '__main__', '__builtins__': builtins, '_concat': _concat_or_and,
+                      'input': scripted_input, 'print': captured_print})
+    code = compile(ast.fix_missing_locations(ConcatTransformer().visit(tree)), name, 'exec')
+
+    try:
+        with time_limit(timeout):
+            exec(code, namespace)
+        error = None
+    except TimeLimitExceeded:
+        error = f"timed out after {timeout}s"
+    except (Exception, SystemExit) as e:
+        error = f"{type(e).__name__}: {e}"
+    return "".join(output), error
+
+
+def run_flowchart(converter, source, tree, name, inputs, max_steps):
+    """Convert a parsed module in memory, run the flowchart and return (output, error)"""
+    worker = converter.new_converter()
+    worker.extract_comments(source, tree)
+    try:
+        root = worker.build_tree(tree, name)
+        program = FlowchartProgram(root, max_steps)
+    except (ConversionError, ExecutionError) as e:
+        return "", f"{type(e).__name__}: {e}"
+    try:
+        return program.run(inputs), None
+    except ExecutionError as e:
+        return "".join(program.output), str(e)
+
+
+def first_difference(expected, actual):
+    """Return (line number, expected line, actual line) of the first differing line"""
+    expected_lines = expected.splitlines()
+    actual_lines = actual.splitlines()
+    for number in range(max(len(expected_lines), len(actual_lines))):
+        left = expected_lines[number] if number < len(expected_lines) else None
+        right = actual_lines[number] if number < len(actual_lines) else None
+        if left != right:
+            return number + 1, left, right
+    return None
+
+
+def read_inputs(source_path, default):
+    input_path = os.path.splitext(source_path)[0] + ".in"
+    if os.path.exists(input_path):
+        with open(input_path, 'r', encoding='utf-8') as f:
+            return f.read().splitlines()
+    return list(default)
+
+
+def check_program(source_path, inputs=(), options=None, timeout=5.0, max_steps=1000000):
+    """Compare one source with its converted flowchart and return the result as a dict"""
+    result = {'source': source_path, 'status': 'match', 'python_error': None,
+              'flowchart_error': None, 'difference': None}
+    try:
+        with open(source_path, 'r', encoding='utf-8') as f:
+            source = f.read()
+        tree = ast.parse(source, filename=source_path)
+    except (OSError, SyntaxError, ValueError, RecursionError, MemoryError) as e:
+        result['status'] = 'error'
+        result['python_error'] = f"{type(e).__name__}: {e}"
+        return result
+
+    inputs = read_inputs(source_path, inputs)
+    name = os.path.basename(source_path)
+    converter = PythonToFlowgorithmConverter(**(options or {}))
+    flowchart_output, result['flowchart_error'] = run_flowchart(converter, source, tree, name,
+                                                                inputs, max_steps)
+    python_output, result['python_error'] = run_python(tree, source_path, inputs, timeout)
+
+    if result['python_error'] is not None:
+        result['status'] = 'error'
+    elif result['flowchart_error'] is not None or python_output != flowchart_output:
+        result['status'] = 'mismatch'
+        result['difference'] = first_difference(python_output, flowchart_output)
+    return result
+
+
+def check_programs(sources, inputs=(), jobs=None, options=None, timeout=5.0, max_steps=1000000):
+    """Check many sources in a process pool and yield the results in source order"""
+    if jobs == 1:
+        for source in sources:
+            yield check_program(source, inputs, options, timeout, max_steps)
+        return
+
+    chunksize = max(1, len(sources) // ((jobs or os.cpu_count() or 1) * 8))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        yield from pool.map(check_program, sources, repeat(tuple(inputs)), repeat(options),
+                            repeat(timeout), repeat(max_steps), chunksize=chunksize)
+
+
+def report(result):
+    if result['status'] == 'match':
+        return
+    if result['status'] == 'error':
+        print(f"ERROR    {result['source']}: Python run failed: {result['python_error']}")
+        return
+    line = f"MISMATCH {result['source']}"
+    if result['flowchart_error'] is not None:
+        line += f": flowchart failed: {result['flowchart_error']}"
+    if result['difference'] is not None:
+        number, expected, actual = result['difference']
+        line += f"\n    line {number}: Python {expected!r}, flowchart {actual!r}"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Python sources with their converted flowcharts")
+    parser.add_argument("sources", nargs="+", help="Python files, directories or glob patterns")
+    parser.add_argument("--input", action="append", default=[],
+                        help="scripted input line for sources without a .in file (repeatable)")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--timeout", type=float, default=5.0, help="seconds each Python run may take")
+    parser.add_argument("--max-steps", type=int, default=1000000,
+                        help="loop iterations and calls each flowchart run may take")
+    args = parser.parse_args()
+
+    sources = [source for source, _ in collect_sources(args.sources)]
+    start = time.perf_counter()
+    counts = {'match': 0, 'mismatch': 0, 'error': 0}
+    for result in check_programs(sources, args.input, args.jobs, timeout=args.timeout,
+                                 max_steps=args.max_steps):
+        counts[result['status']] += 1
+        report(result)
+
+    elapsed = time.perf_counter() - start
+    rate = len(sources) / elapsed if elapsed > 0 else 0.0
+    print(f"Checked {len(sources)} programs in {elapsed:.2f}s ({rate:.0f} programs/s): "
+          f"{counts['match']} match, {counts['mismatch']} mismatch, {counts['error']} error")
+    if counts['mismatch']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""Stream .fprg files and compare them semantically, one file or a whole archive at a time
+
+    python fprg_reader.py diff old.fprg new.fprg
+    python fprg_reader.py audit archive/ sources/ -j 8
+
+Files are read with ET.iterparse and every element is dropped as soon as it has
+been read, so memory stays flat however large a file is. The saved, created and
+edited attributes change on every conversion and are ignored, as are attribute
+order and indentation.
+"""
+import argparse
+import hashlib
+import io
+import os
+import sys
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat, zip_longest
+
+from converter import ConversionError, PythonToFlowgorithmConverter
+
+VOLATILE_ATTRIBUTES = ('saved', 'created', 'edited')
+
+
+def iter_elements(source):
+    """Yield normalized ('start', tag, attributes) and ('end', tag, None) events
+
+    `source` is a path or a binary file object. Attributes are a sorted tuple of
+    pairs, with the value of volatile program attributes blanked out.
+    """
+    open_elements = []
+    for event, element in ET.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            attributes = element.attrib
+            if element.tag == 'attribute' and attributes.get('name') in VOLATILE_ATTRIBUTES:
+                attributes = dict(attributes, value="")
+            open_elements.append(element)
+            yield 'start', element.tag, tuple(sorted(attributes.items()))
+        else:
+            open_elements.pop()
+            element.clear()
+            if open_elements:
+                # Earlier siblings are gone already, so this removes the first child
+                open_elements[-1].remove(element)
+            yield 'end', element.tag, None
+
+
+def fingerprint(source):
+    """Return a digest of the normalized content, equal for semantically equal files"""
+    digest = hashlib.sha256()
+    for event in iter_elements(source):
+        digest.update(repr(event).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def first_difference(expected, actual):
+    """Return (path, expected event, actual event) for the first difference, or None
+
+    Both files are streamed side by side, so nothing past the difference is read.
+    The path locates the element, e.g. 'flowgorithm/function[Main]/body/if'.
+    """
+    path = []
+    for left, right in zip_longest(iter_elements(expected), iter_elements(actual)):
+        if left != right:
+            if left is not None and left[0] == 'start':
+                path.append(left[1])
+            return "/".join(path), left, right
+        event, tag, attributes = left
+        if event == 'start':
+            name = dict(attributes).get('name') if tag == 'function' else None
+            path.append(f"{tag}[{name}]" if name else tag)
+        else:
+            path.pop()
+    return None
+
+
+def describe(difference):
+    path, expected, actual = difference
+
+    def show(event):
+        if event is None:
+            return "end of file"
+        kind, tag, attributes = event
+        if kind == 'end':
+            return f"</{tag}>"
+        return "<" + " ".join([tag] + [f'{key}="{value}"' for key, value in attributes]) + ">"
+
+    return f"{path}: expected {show(expected)}, got {show(actual)}"
+
+
+def audit_one(fprg_path, source_path, options=None):
+    """Convert the source of one archived file again and compare it with the archive"""
+    result = {'archive': fprg_path, 'source': source_path, 'status': 'unchanged', 'difference': None}
+    if not os.path.exists(source_path):
+        result['status'] = 'missing'
+        return result
+
+    converter = PythonToFlowgorithmConverter(**(options or {}))
+    try:
+        with open(source_path, 'r', encoding='utf-8') as f:
+            source = f.read()
+        fprg = converter.convert_source(source, os.path.basename(source_path))
+        difference = first_difference(fprg_path, io.BytesIO(fprg))
+    except (OSError, SyntaxError, ValueError, ConversionError, ET.ParseError) as e:
+        result['status'] = 'error'
+        result['difference'] = f"{type(e).__name__}: {e}"
+        return result
+
+    if difference is not None:
+        result['status'] = 'changed'
+        result['difference'] = describe(difference)
+    return result
+
+
+def find_archive(archive_dir, source_dir):
+    """Pair every .fprg under archive_dir with the .py at the same relative path in source_dir"""
+    pairs = []
+    for root, dirs, files in os.walk(archive_dir):
+        dirs.sort()
+        for filename in sorted(files):
+            if filename.endswith(".fprg"):
+                fprg_path = os.path.join(root, filename)
+                relative = os.path.relpath(fprg_path, archive_dir)
+                pairs.append((fprg_path, os.path.join(source_dir, os.path.splitext(relative)[0] + ".py")))
+    return pairs
+
+
+def audit(archive_dir, source_dir, jobs=None, options=None):
+    """Audit an archive against the current converter and yield one result per file, in order"""
+    pairs = find_archive(archive_dir, source_dir)
+    if not pairs:
+        return
+    archived = [fprg_path for fprg_path, _ in pairs]
+    sources = [source_path for _, source_path in pairs]
+    if jobs == 1:
+        yield from map(audit_one, archived, sources, repeat(options))
+        return
+
+    chunksize = max(1, len(pairs) // ((jobs or os.cpu_count() or 1) * 8))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        yield from pool.map(audit_one, archived, sources, repeat(options), chunksize=chunksize)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare .fprg files semantically")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    diff_parser = commands.add_parser("diff", help="compare two .fprg files")
+    diff_parser.add_argument("expected")
+    diff_parser.add_argument("actual")
+
+    audit_parser = commands.add_parser("audit", help="report which archived files the current converter changes")
+    audit_parser.add_argument("archive", help="directory of previously generated .fprg files")
+    audit_parser.add_argument("sources", help="directory with the .py sources at the same relative paths")
+    audit_parser.add_argument("-j", "--jobs", type=int, default=None,
+                              help="worker processes (default: CPU count)")
+    audit_parser.add_argument("--array-threshold", type=int, default=32)
+    audit_parser.add_argument("--optimize", action="store_true")
+    args = parser.parse_args()
+
+    if args.command == "diff":
+        difference = first_difference(args.expected, args.actual)
+        if difference is None:
+            print("No semantic differences")
+            return
+        print(describe(difference))
+        sys.exit(1)
+
+    options = {'array_threshold': args.array_threshold, 'optimize': args.optimize}
+    counts = {'unchanged': 0, 'changed': 0, 'missing': 0, 'error': 0}
+    for result in audit(args.archive, args.sources, args.jobs, options):
+        counts[result['status']] += 1
+        if result['status'] == 'changed':
+            print(f"CHANGED  {result['archive']}\n    {result['difference']}")
+        elif result['status'] == 'missing':
+            print(f"MISSING  {result['archive']}: no source at {result['source']}")
+        elif result['status'] == 'error':
+            print(f"ERROR    {result['archive']}: {result['difference']}")
+    print(f"Audited {sum(counts.values())} files: {counts['unchanged']} unchanged, {counts['changed']} changed, "
+          f"{counts['missing']} without source, {counts['error']} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,480 @@
+"""Run Flowgorithm programs from .fprg files or converted trees
+
+Every expression attribute is parsed once, when the program is loaded, into a
+tree of Python closures; running the program then only calls those closures.
+Values print the way Python's print would show them, so the output of a
+converted program can be compared line by line with the original script.
+"""
+import math
+import random
+import re
+import xml.etree.ElementTree as ET
+
+import ir
+
+
+class ExecutionError(Exception):
+    """Raised when a flowchart cannot be compiled or fails while running"""
+
+
+TOKEN = re.compile(r'''
+    \s*(?:
+        (?P<number>\d+\.\d*|\.\d+|\d+)
+      | (?P<string>"[^"]*"|'[^']*')
+      | (?P<name>[A-Za-z_][A-Za-z_0-9]*)
+      | (?P<op><=|>=|==|!=|<>|&&|\|\||[-+*/%^&<>=!(),\[\]])
+    )''', re.VERBOSE)
+
+KEYWORD_OPERATORS = {'and': 'and', 'or': 'or', 'not': 'not', 'mod': '%'}
+ALIASES = {'&&': 'and', '||': 'or', '!': 'not', '=': '==', '<>': '!='}
+
+
+def tokenize(text):
+    """Split an expression into (kind, value) tokens"""
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = TOKEN.match(text, position)
+        if match is None:
+            raise ExecutionError(f"Cannot parse expression {text!r} at {text[position:]!r}")
+        position = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'name' and value.lower() in KEYWORD_OPERATORS:
+            kind, value = 'op', KEYWORD_OPERATORS[value.lower()]
+        elif kind == 'op':
+            value = ALIASES.get(value, value)
+        tokens.append((kind, value))
+    tokens.append(('end', None))
+    return tokens
+
+
+def _remainder(a, b):
+    """Flowgorithm's %, which keeps the sign of the dividend like C#"""
+    if isinstance(a, int) and isinstance(b, int):
+        result = abs(a) % abs(b)
+        return -result if a < 0 else result
+    return math.fmod(a, b)
+
+
+def _to_string(value):
+    return str(value)
+
+
+def _concat(a, b):
+    return _to_string(a) + _to_string(b)
+
+
+def _item(array, index):
+    if index < 0:
+        raise IndexError(f"Array index {index} is negative")
+    return array[index]
+
+
+def _char(text, index):
+    if index < 0:
+        raise IndexError(f"Char index {index} is negative")
+    return text[index]
+
+
+BINARY_OPERATORS = {
+    'or': (1, lambda a, b: a or b),
+    'and': (2, lambda a, b: a and b),
+    '==': (4, lambda a, b: a == b),
+    '!=': (4, lambda a, b: a != b),
+    '<': (4, lambda a, b: a < b),
+    '<=': (4, lambda a, b: a <= b),
+    '>': (4, lambda a, b: a > b),
+    '>=': (4, lambda a, b: a >= b),
+    '+': (5, lambda a, b: a + b),
+    '-': (5, lambda a, b: a - b),
+    '&': (5, _concat),
+    '*': (6, lambda a, b: a * b),
+    '/': (6, lambda a, b: a / b),
+    '%': (6, _remainder),
+    '^': (8, lambda a, b: a ** b),
+}
+RIGHT_ASSOCIATIVE = {'^'}
+PREFIX_PRECEDENCE = 7
+
+INTRINSICS = {
+    'Abs': abs,
+    'ArcCos': math.acos,
+    'ArcSin': math.asin,
+    'ArcTan': math.atan,
+    'Char': _char,
+    'Cos': math.cos,
+    'Int': int,
+    'Len': len,
+    'Log': math.log,
+    'Log10': math.log10,
+    'Sgn': lambda x: (x > 0) - (x < 0),
+    'Sin': math.sin,
+    'Size': len,
+    'Sqrt': math.sqrt,
+    'Tan': math.tan,
+    'ToChar': chr,
+    'ToCode': ord,
+    'ToFixed': lambda value, digits: f"{value:.{digits}f}",
+    'ToInteger': int,
+    'ToReal': float,
+    'ToString': _to_string,
+}
+
+DEFAULTS = {'Integer': 0, 'Real': 0.0, 'String': "", 'Boolean': False}
+
+
+class Parser:
+    """Pratt parser turning one expression string into a closure of the frame"""
+
+    def __init__(self, text, program):
+        self.text = text
+        self.program = program
+        self.tokens = tokenize(text)
+        self.position = 0
+
+    def next(self):
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def peek(self):
+        return self.tokens[self.position]
+
+    def expect(self, value):
+        kind, actual = self.next()
+        if actual != value or kind != 'op':
+            raise ExecutionError(f"Expected {value!r} in expression {self.text!r}")
+
+    def parse(self):
+        closure = self.expression(0)
+        if self.peek()[0] != 'end':
+            raise ExecutionError(f"Unexpected {self.peek()[1]!r} in expression {self.text!r}")
+        return closure
+
+    def expression(self, min_precedence):
+        left = self.prefix()
+        while True:
+            kind, value = self.peek()
+            if kind != 'op' or value not in BINARY_OPERATORS:
+                return left
+            precedence, function = BINARY_OPERATORS[value]
+            if precedence < min_precedence:
+                return left
+            self.next()
+            right = self.expression(precedence if value in RIGHT_ASSOCIATIVE else precedence + 1)
+            left = self.binary(value, function, left, right)
+
+    def binary(self, op, function, left, right):
+        if op == 'and':
+            return lambda frame: left(frame) and right(frame)
+        if op == 'or':
+            return lambda frame: left(frame) or right(frame)
+        return lambda frame: function(left(frame), right(frame))
+
+    def prefix(self):
+        kind, value = self.next()
+        if kind == 'number':
+            constant = float(value) if '.' in value else int(value)
+            return lambda frame: constant
+        if kind == 'string':
+            constant = value[1:-1]
+            return lambda frame: constant
+        if kind == 'name':
+            return self.name(value)
+        if value == '(':
+            closure = self.expression(0)
+            self.expect(')')
+            return closure
+        if value == '-':
+            operand = self.expression(PREFIX_PRECEDENCE)
+            return lambda frame: -operand(frame)
+        if value == '+':
+            return self.expression(PREFIX_PRECEDENCE)
+        if value == 'not':
+            operand = self.expression(PREFIX_PRECEDENCE)
+            return lambda frame: not operand(frame)
+        raise ExecutionError(f"Unexpected {value!r} in expression {self.text!r}")
+
+    def name(self, name):
+        lowered = name.lower()
+        if lowered in ('true', 'false'):
+            constant = lowered == 'true'
+            return lambda frame: constant
+        if lowered == 'pi':
+            return lambda frame: math.pi
+
+        kind, value = self.peek()
+        if kind == 'op' and value == '(':
+            self.next()
+            args = []
+            if self.peek() != ('op', ')'):
+                args.append(self.expression(0))
+                while self.peek() == ('op', ','):
+                    self.next()
+                    args.append(self.expression(0))
+            self.expect(')')
+            return self.program.compile_call(name, args)
+
+        if kind == 'op' and value == '[':
+            self.next()
+            index = self.expression(0)
+            self.expect(']')
+            return lambda frame: _item(frame[name], index(frame))
+        return lambda frame: frame[name]
+
+
+class Function:
+    __slots__ = ('name', 'return_variable', 'parameters', 'body')
+
+    def __init__(self, name, return_variable, parameters):
+        self.name = name
+        self.return_variable = return_variable
+        self.parameters = parameters
+        self.body = None
+
+
+class FlowchartProgram:
+    """A compiled flowchart that can be run many times with different input
+
+    `root` is a <flowgorithm> Element, such as the one returned by load(), or the IR
+    tree built by PythonToFlowgorithmConverter.build_tree(). A run stops with an
+    ExecutionError after `max_steps` loop iterations and function calls, so
+    non-terminating programs fail instead of hanging. Instances are not thread-safe.
+    """
+
+    def __init__(self, root, max_steps=1000000):
+        if isinstance(root, ir.Node):
+            root = ir.to_element(root)
+        self.max_steps = max_steps
+        self.functions = {}
+        self.expressions = {}
+        self.output = []
+        self.inputs = iter(())
+        self.steps = 0
+        self.random = random.Random(0)
+
+        elements = root.findall("function")
+        for element in elements:
+            parameters = [(param.get("name"), param.get("type"), param.get("array") == "True")
+                          for param in element.iter("parameter")]
+            self.functions[element.get("name")] = Function(
+                element.get("name"), element.get("variable") or None, parameters)
+        for element in elements:
+            types = {name: kind for name, kind, _ in self.functions[element.get("name")].parameters}
+            body = element.find("body")
+            for declare in body.iter("declare"):
+                types[declare.get("name")] = declare.get("type")
+            self.functions[element.get("name")].body = self.compile_block(body, types)
+        if "Main" not in self.functions:
+            raise ExecutionError("The program has no Main function")
+
+    def compile_expression(self, text):
+        """Return the closure for an expression string, parsing each distinct string once"""
+        closure = self.expressions.get(text)
+        if closure is None:
+            closure = self.expressions[text] = Parser(text, self).parse()
+        return closure
+
+    def compile_call(self, name, args):
+        function = self.functions.get(name)
+        if function is not None:
+            return lambda frame: self.invoke(function, [arg(frame) for arg in args])
+        if name == 'Random':
+            return lambda frame: self.random.randrange(args[0](frame))
+        intrinsic = INTRINSICS.get(name)
+        if intrinsic is None:
+            raise ExecutionError(f"Unknown function {name}()")
+        if len(args) == 1:
+            arg = args[0]
+            return lambda frame: intrinsic(arg(frame))
+        return lambda frame: intrinsic(*[arg(frame) for arg in args])
+
+    def compile_target(self, text, types):
+        """Return store(frame, value) for an assignment or input target such as x or a[i]"""
+        name, bracket, index_text = text.partition("[")
+        name = name.strip()
+        coerce = self.coercion(types.get(name))
+        if not bracket:
+            def store(frame, value):
+                if name not in frame:
+                    raise ExecutionError(f"Variable {name} is not declared")
+                frame[name] = coerce(value)
+            return store
+
+        index = self.compile_expression(index_text.rstrip()[:-1])
+
+        def store_item(frame, value):
+            array = frame[name]
+            position = index(frame)
+            if not 0 <= position < len(array):
+                raise ExecutionError(f"Index {position} is outside the array {name}")
+            array[position] = coerce(value)
+        return store_item
+
+    def coercion(self, kind):
+        if kind == 'Integer':
+            return lambda value: int(value) if isinstance(value, float) else value
+        if kind == 'Real':
+            return lambda value: float(value) if isinstance(value, int) and not isinstance(value, bool) else value
+        return lambda value: value
+
+    def parse_input(self, text, kind):
+        if kind == 'Integer':
+            return int(text)
+        if kind == 'Real':
+            return float(text)
+        if kind == 'Boolean':
+            return text.strip().lower() == "true"
+        return text
+
+    def compile_block(self, element, types):
+        """Compile the statements directly under element into one closure"""
+        children = element if element is not None else ()
+        statements = [self.compile_statement(child, types) for child in children]
+        statements = [statement for statement in statements if statement is not None]
+        if len(statements) == 1:
+            return statements[0]
+
+        def block(frame):
+            for statement in statements:
+                statement(frame)
+        return block
+
+    def compile_statement(self, element, types):
+        tag = element.tag
+        if tag == "declare":
+            return self.compile_declare(element)
+        if tag == "assign":
+            store = self.compile_target(element.get("variable"), types)
+            value = self.compile_expression(element.get("expression"))
+            return lambda frame: store(frame, value(frame))
+        if tag == "output":
+            value = self.compile_expression(element.get("expression"))
+            end = "\n" if element.get("newline", "True") == "True" else ""
+            output = self.output
+            return lambda frame: output.append(_to_string(value(frame)) + end)
+        if tag == "input":
+            return self.compile_input(element, types)
+        if tag == "call":
+            call = self.compile_expression(element.get("expression"))
+            return lambda frame: call(frame)
+        if tag == "if":
+            return self.compile_if(element, types)
+        if tag == "while":
+            return self.compile_while(element, types)
+        if tag == "for":
+            return self.compile_for(element, types)
+        if tag == "comment":
+            return None
+        raise ExecutionError(f"Unsupported flowchart element <{tag}>")
+
+    def compile_declare(self, element):
+        name = element.get("name")
+        default = DEFAULTS.get(element.get("type"), 0)
+        if element.get("array") != "True":
+            return lambda frame: frame.__setitem__(name, default)
+        size = self.compile_expression(element.get("size"))
+        return lambda frame: frame.__setitem__(name, [default] * size(frame))
+
+    def compile_input(self, element, types):
+        target = element.get("variable")
+        store = self.compile_target(target, types)
+        kind = types.get(target.partition("[")[0].strip())
+
+        def read(frame):
+            text = next(self.inputs, None)
+            if text is None:
+                raise ExecutionError("The program asked for more input than was given")
+            store(frame, self.parse_input(text, kind))
+        return read
+
+    def compile_if(self, element, types):
+        condition = self.compile_expression(element.get("expression"))
+        then = self.compile_block(element.find("then"), types)
+        orelse = self.compile_block(element.find("else"), types)
+
+        def run_if(frame):
+            if condition(frame):
+                then(frame)
+            else:
+                orelse(frame)
+        return run_if
+
+    def compile_while(self, element, types):
+        condition = self.compile_expression(element.get("expression"))
+        body = self.compile_block(element, types)
+
+        def run_while(frame):
+            while condition(frame):
+                self.step()
+                body(frame)
+        return run_while
+
+    def compile_for(self, element, types):
+        """Compile a for loop, whose end value is inclusive in Flowgorithm"""
+        name = element.get("variable")
+        start = self.compile_expression(element.get("start"))
+        end = self.compile_expression(element.get("end"))
+        step = self.compile_expression(element.get("step"))
+        increasing = element.get("direction") != "dec"
+        body = self.compile_block(element, types)
+
+        def run_for(frame):
+            value, last, delta = start(frame), end(frame), step(frame)
+            if not increasing:
+                delta = -delta
+            while value <= last if increasing else value >= last:
+                self.step()
+                frame[name] = value
+                body(frame)
+                value += delta
+        return run_for
+
+    def step(self):
+        self.steps += 1
+        if self.steps > self.max_steps:
+            raise ExecutionError(f"Stopped after {self.max_steps} steps")
+
+    def invoke(self, function, args):
+        self.step()
+        frame = {}
+        for (name, _, _), value in zip(function.parameters, args):
+            frame[name] = value
+        function.body(frame)
+        if function.return_variable:
+            return frame.get(function.return_variable)
+        return None
+
+    def run(self, inputs=()):
+        """Run Main with the given input lines and return everything it printed
+
+        When the run fails, what was printed up to that point is left in `output`.
+        """
+        self.output.clear()
+        self.inputs = iter(inputs)
+        self.steps = 0
+        self.random.seed(0)
+        try:
+            self.invoke(self.functions["Main"], [])
+        except ExecutionError:
+            raise
+        except RecursionError:
+            raise ExecutionError("The program nests or recurses too deeply to run")
+        except (KeyError, IndexError, TypeError, ValueError, ArithmeticError, AttributeError) as e:
+            raise ExecutionError(f"{type(e).__name__}: {e}")
+        return "".join(self.output)
+
+
+def load(path):
+    """Parse a .fprg file into its <flowgorithm> Element"""
+    try:
+        return ET.parse(path).getroot()
+    except ET.ParseError as e:
+        raise ExecutionError(f"Cannot read '{path}': {e}")
+
+
+def run_file(path, inputs=(), max_steps=1000000):
+    """Run a .fprg file and return its output"""
+    return FlowchartProgram(load(path), max_steps).run(inputs)
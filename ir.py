@@ -0,0 +1,307 @@
+"""Slotted intermediate representation of a Flowgorithm program
+
+The converter lowers Python statements to these nodes. Backends write them as
+.fprg text or build an ElementTree, and optimization passes rewrite them in
+place without allocating a DOM.
+"""
+
+
+class Node:
+    """Base class: `fields` are written as XML attributes, `blocks` name the child lists
+
+    Each entry of `blocks` is (slot, wrapper), where wrapper is the tag of the element
+    the children are written inside, or None to write them directly under the node.
+    `source` keeps the AST expression an expression string was rendered from, if any.
+    """
+    __slots__ = ()
+    tag = None
+    fields = ()
+    blocks = ()
+
+    def items(self):
+        return [(field, str(getattr(self, field))) for field in self.fields]
+
+    def children(self):
+        """Return the child nodes, with wrapped lists inside Block nodes"""
+        children = []
+        for slot, wrapper in self.blocks:
+            nodes = getattr(self, slot)
+            if wrapper is None:
+                children.extend(nodes)
+            else:
+                children.append(Block(wrapper, nodes))
+        return children
+
+    def iter(self):
+        """Yield this node and every descendant in document order, like Element.iter()"""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children()))
+
+
+class Block(Node):
+    """A wrapper element such as <then> or <body> around a list of nodes"""
+    __slots__ = ('tag', 'nodes')
+
+    def __init__(self, tag, nodes):
+        self.tag = tag
+        self.nodes = nodes
+
+    def children(self):
+        return self.nodes
+
+
+class Declare(Node):
+    __slots__ = ('name', 'type', 'array', 'size')
+    tag = "declare"
+    fields = __slots__
+    scalars = __slots__
+
+    def __init__(self, name, type, array=False, size=""):
+        self.name = name
+        self.type = type
+        self.array = array
+        self.size = size
+
+
+class Assign(Node):
+    __slots__ = ('variable', 'expression', 'source')
+    tag = "assign"
+    fields = ('variable', 'expression')
+    scalars = fields
+
+    def __init__(self, variable, expression, source=None):
+        self.variable = variable
+        self.expression = expression
+        self.source = source
+
+
+class Input(Node):
+    __slots__ = ('variable',)
+    tag = "input"
+    fields = __slots__
+    scalars = __slots__
+
+    def __init__(self, variable):
+        self.variable = variable
+
+
+class Output(Node):
+    __slots__ = ('expression', 'newline', 'source')
+    tag = "output"
+    fields = ('expression', 'newline')
+    scalars = fields
+
+    def __init__(self, expression, newline=True, source=None):
+        self.expression = expression
+        self.newline = newline
+        self.source = source
+
+
+class Call(Node):
+    __slots__ = ('expression',)
+    tag = "call"
+    fields = __slots__
+    scalars = __slots__
+
+    def __init__(self, expression):
+        self.expression = expression
+
+
+class If(Node):
+    __slots__ = ('expression', 'then', 'orelse', 'source')
+    tag = "if"
+    fields = ('expression',)
+    scalars = fields
+    blocks = (('then', "then"), ('orelse', "else"))
+
+    def __init__(self, expression, source=None):
+        self.expression = expression
+        self.then = []
+        self.orelse = []
+        self.source = source
+
+
+class While(Node):
+    __slots__ = ('expression', 'body', 'source')
+    tag = "while"
+    fields = ('expression',)
+    scalars = fields
+    blocks = (('body', None),)
+
+    def __init__(self, expression, source=None):
+        self.expression = expression
+        self.body = []
+        self.source = source
+
+
+class For(Node):
+    __slots__ = ('variable', 'start', 'end', 'direction', 'step', 'body')
+    tag = "for"
+    fields = ('variable', 'start', 'end', 'direction', 'step')
+    scalars = fields
+    blocks = (('body', None),)
+
+    def __init__(self, variable, start, end, direction="inc", step=1):
+        self.variable = variable
+        self.start = start
+        self.end = end
+        self.direction = direction
+        self.step = step
+        self.body = []
+
+
+class Parameter(Node):
+    __slots__ = ('name', 'type', 'array')
+    tag = "parameter"
+    fields = __slots__
+    scalars = __slots__
+
+    def __init__(self, name, type, array=False):
+        self.name = name
+        self.type = type
+        self.array = array
+
+
+class Function(Node):
+    __slots__ = ('name', 'type', 'variable', 'parameters', 'body')
+    tag = "function"
+    fields = ('name', 'type', 'variable')
+    scalars = fields
+    blocks = (('parameters', "parameters"), ('body', "body"))
+
+    def __init__(self, name, type="None", variable=""):
+        self.name = name
+        self.type = type
+        self.variable = variable
+        self.parameters = []
+        self.body = []
+
+
+class Attribute(Node):
+    __slots__ = ('name', 'value')
+    tag = "attribute"
+    fields = __slots__
+    scalars = __slots__
+
+    def __init__(self, name, value):
+        self.name = name
+        self.value = value
+
+
+class Program(Node):
+    __slots__ = ('fileversion', 'attributes', 'functions')
+    tag = "flowgorithm"
+    fields = ('fileversion',)
+    scalars = fields
+    blocks = (('attributes', "attributes"), ('functions', None))
+
+    def __init__(self, fileversion="4.2"):
+        self.fileversion = fileversion
+        self.attributes = []
+        self.functions = []
+
+
+def escape_attribute(value):
+    """Escape an attribute value the way Flowgorithm expects it"""
+    return (value.replace("&", "&amp;").replace("<", "&lt;").replace('"', "&quot;")
+            .replace(">", "&gt;").replace("\n", "&#10;").replace("\r", "&#13;").replace("\t", "&#9;"))
+
+
+class OutputLimitExceeded(Exception):
+    """Raised by write_xml once the output grows past its limit"""
+
+
+def write_xml(root, stream, compact=False, limit=None):
+    """Stream a node and its descendants to a text file handle as .fprg XML
+
+    With `limit`, writing stops with OutputLimitExceeded once the output would take
+    more than that many bytes encoded as UTF-8.
+    """
+    write = stream.write
+    if limit is not None:
+        write = _limited_writer(write, limit)
+    newline, indent = ("", "") if compact else ("\n", "    ")
+
+    write('<?xml version="1.0" ?>')
+    stack = [(root, 0)]
+    while stack:
+        node, depth = stack.pop()
+        prefix = newline + indent * depth
+        if isinstance(node, str):
+            write(f"{prefix}</{node}>")
+            continue
+
+        attrs = "".join(f' {key}="{escape_attribute(value)}"' for key, value in node.items())
+        children = node.children()
+        if children:
+            write(f"{prefix}<{node.tag}{attrs}>")
+            stack.append((node.tag, depth))
+            stack.extend((child, depth + 1) for child in reversed(children))
+        else:
+            write(f"{prefix}<{node.tag}{attrs}/>")
+
+
+def _limited_writer(write, limit):
+    written = 0
+
+    def limited(text):
+        nonlocal written
+        written += len(text) if text.isascii() else len(text.encode('utf-8'))
+        if written > limit:
+            raise OutputLimitExceeded(f"output is larger than {limit} bytes")
+        write(text)
+
+    return limited
+
+
+def to_element(root):
+    """Build an ElementTree element from a node, for callers that need a DOM"""
+    import xml.etree.ElementTree as ET
+    element = ET.Element(root.tag, dict(root.items()))
+    stack = [(root, element)]
+    while stack:
+        node, parent = stack.pop()
+        for child in node.children():
+            child_element = ET.SubElement(parent, child.tag, dict(child.items()))
+            stack.append((child, child_element))
+    return element
+
+
+def flatten(root):
+    """Return a subtree as a flat pre-order list of records, cheap to pickle at any depth
+
+    Source expressions are not kept, so passes that need them must run first.
+    """
+    records = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        blocks = [getattr(node, slot) for slot, _ in node.blocks]
+        records.append((type(node), tuple(getattr(node, slot) for slot in node.scalars),
+                        tuple(len(nodes) for nodes in blocks)))
+        for nodes in reversed(blocks):
+            stack.extend(reversed(nodes))
+    return records
+
+
+def unflatten(records):
+    """Rebuild the subtree returned by flatten()"""
+    root = None
+    stack = []
+    for cls, values, counts in records:
+        node = cls(*values)
+        if stack:
+            frame = stack[-1]
+            frame[0].append(node)
+            frame[1] -= 1
+            if frame[1] == 0:
+                stack.pop()
+        else:
+            root = node
+        for (slot, _), count in reversed(list(zip(cls.blocks, counts))):
+            if count:
+                stack.append([getattr(node, slot), count])
+    return root
@@ -0,0 +1,65 @@
+import json
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+
+class ConversionProfile:
+    """Collect per-stage timings and emitted element counts across conversions
+
+    Pass an instance as `profile=` to PythonToFlowgorithmConverter. `callback`, if given,
+    is called as callback(stage, detail, seconds) after every timed stage, where detail
+    is the function name for convert_function and None otherwise.
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.stages = {}
+        self.functions = {}
+        self.elements = Counter()
+        self.conversions = 0
+
+    @contextmanager
+    def stage(self, stage, detail=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, detail, time.perf_counter() - start)
+
+    def record(self, stage, detail, seconds):
+        totals = self.stages.setdefault(stage, {'count': 0, 'seconds': 0.0})
+        totals['count'] += 1
+        totals['seconds'] += seconds
+        if detail is not None:
+            self.functions[detail] = self.functions.get(detail, 0.0) + seconds
+        if self.callback is not None:
+            self.callback(stage, detail, seconds)
+
+    def count_elements(self, root):
+        """Count the emitted elements of a finished tree by tag"""
+        self.conversions += 1
+        self.elements.update(elem.tag for elem in root.iter())
+
+    def to_dict(self):
+        return {
+            'conversions': self.conversions,
+            'stages': self.stages,
+            'functions': self.functions,
+            'elements': dict(self.elements),
+        }
+
+    def merge(self, data):
+        """Add the totals from another profile's to_dict() output, e.g. from a worker process"""
+        self.conversions += data['conversions']
+        for stage, totals in data['stages'].items():
+            mine = self.stages.setdefault(stage, {'count': 0, 'seconds': 0.0})
+            mine['count'] += totals['count']
+            mine['seconds'] += totals['seconds']
+        for name, seconds in data['functions'].items():
+            self.functions[name] = self.functions.get(name, 0.0) + seconds
+        self.elements.update(data['elements'])
+
+    def dump(self, stream):
+        json.dump(self.to_dict(), stream, indent=2)
+        stream.write("\n")
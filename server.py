@@ -0,0 +1,156 @@
+import io
+import json
+import os
+import signal
+import socketserver
+import sys
+import threading
+
+from diagnostics import DiagnosticCollector
+from workers import start_pool, warm_up, worker_converter
+
+
+def handle_request(request):
+    """Convert one decoded request and return the response object"""
+    response = {'id': request.get('id')}
+    source = request.get('source')
+    path = request.get('path')
+    name = request.get('name') or (os.path.basename(path) if path else "program")
+
+    diagnostics = DiagnosticCollector()
+    try:
+        if source is None:
+            if path is None:
+                raise ValueError("request needs either 'source' or 'path'")
+            with open(path, 'r', encoding='utf-8') as f:
+                source = f.read()
+        fprg = worker_converter().convert_source(source, name, diagnostics=diagnostics)
+    except SyntaxError as e:
+        response['ok'] = False
+        response['error'] = {'type': 'SyntaxError', 'message': e.msg, 'line': e.lineno, 'column': e.offset}
+    except Exception as e:
+        response['ok'] = False
+        response['error'] = {'type': type(e).__name__, 'message': str(e)}
+    else:
+        response['ok'] = True
+        response['fprg'] = fprg.decode('utf-8')
+
+    if diagnostics.diagnostics:
+        response['diagnostics'] = [diagnostic.to_dict() for diagnostic in diagnostics]
+    return response
+
+
+class ConversionServer:
+    """Answer JSON-lines conversion requests from a warm, bounded pool of workers"""
+
+    def __init__(self, jobs=None, options=None, max_pending=None):
+        self.jobs = jobs or os.cpu_count() or 1
+        self.pool = start_pool(self.jobs, options)
+        self.slots = threading.BoundedSemaphore(max_pending or self.jobs * 2)
+
+    def warm_up(self):
+        """Start every worker process up front so the first requests are fast"""
+        warm_up(self.pool, self.jobs)
+
+    def submit(self, line, respond):
+        """Queue one request line; respond(response) is called when it finishes"""
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as e:
+            respond({'id': None, 'ok': False, 'error': {'type': 'InvalidRequest', 'message': str(e)}})
+            return None
+
+        self.slots.acquire()
+        future = self.pool.submit(handle_request, request)
+
+        def done(future):
+            self.slots.release()
+            try:
+                response = future.result()
+            except Exception as e:
+                response = {'id': request.get('id'), 'ok': False,
+                            'error': {'type': type(e).__name__, 'message': str(e)}}
+            respond(response)
+
+        future.add_done_callback(done)
+        return future
+
+    def serve_lines(self, reader, write):
+        """Serve newline-delimited requests from reader until EOF and every response is written"""
+        answered = threading.Condition()
+        unanswered = 0
+
+        def respond(response):
+            nonlocal unanswered
+            data = json.dumps(response) + "\n"
+            with answered:
+                try:
+                    write(data)
+                finally:
+                    unanswered -= 1
+                    answered.notify_all()
+
+        for line in reader:
+            if line.strip():
+                with answered:
+                    unanswered += 1
+                self.submit(line, respond)
+
+        with answered:
+            answered.wait_for(lambda: unanswered == 0)
+
+    def serve_stdio(self):
+        """Serve requests on stdin and write responses to stdout"""
+        def write(data):
+            sys.stdout.write(data)
+            sys.stdout.flush()
+
+        self.serve_lines(sys.stdin, write)
+
+    def serve_socket(self, path):
+        """Serve requests on a local Unix socket, one JSON-lines stream per connection"""
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                reader = io.TextIOWrapper(self.rfile, encoding='utf-8')
+
+                def write(data):
+                    self.wfile.write(data.encode('utf-8'))
+                    self.wfile.flush()
+
+                server.serve_lines(reader, write)
+
+        if os.path.exists(path):
+            os.remove(path)
+        with socketserver.ThreadingUnixStreamServer(path, Handler) as unix_server:
+            unix_server.daemon_threads = True
+            try:
+                unix_server.serve_forever()
+            finally:
+                os.remove(path)
+
+    def close(self):
+        self.pool.shutdown()
+
+
+def serve(socket_path=None, jobs=None, options=None):
+    """Run the conversion server until stdin closes or the process is interrupted"""
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    server = ConversionServer(jobs=jobs, options=options)
+    try:
+        server.warm_up()
+        if socket_path:
+            print(f"Listening on {socket_path}", file=sys.stderr)
+            server.serve_socket(socket_path)
+        else:
+            server.serve_stdio()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
@@ -0,0 +1,141 @@
+"""Destinations for the .fprg files produced by a multi-file run
+
+A sink receives (relative_path, bytes) pairs in order. DirectorySink writes one
+file per result; the archive sinks stream every result into a single zip or tar
+file, or to stdout, and end with a manifest entry describing each conversion.
+"""
+import io
+import json
+import os
+import sys
+import tarfile
+import time
+import zipfile
+
+MANIFEST_NAME = "manifest.json"
+
+TAR_MODES = {
+    '.tar': 'w|',
+    '.tar.gz': 'w|gz', '.tgz': 'w|gz',
+    '.tar.bz2': 'w|bz2', '.tbz2': 'w|bz2',
+    '.tar.xz': 'w|xz', '.txz': 'w|xz',
+}
+
+
+class Sink:
+    """Base class for output sinks; use as a context manager so the output is finalized"""
+    to_stdout = False
+    writes_manifest = False
+
+    def write(self, name, data):
+        raise NotImplementedError
+
+    def location(self, name):
+        """Return where the entry for name ends up, for status messages"""
+        return name
+
+    def write_manifest(self, entries):
+        data = json.dumps({'files': entries}, indent=2, sort_keys=True).encode('utf-8')
+        self.write(MANIFEST_NAME, data)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class DirectorySink(Sink):
+    """Write each result as its own file below a directory"""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def location(self, name):
+        return os.path.join(self.directory, name)
+
+    def write(self, name, data):
+        path = self.location(name)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+
+
+class ZipSink(Sink):
+    """Stream every result into one zip file; works on unseekable streams too"""
+    writes_manifest = True
+
+    def __init__(self, target, mtime=None):
+        self.archive = zipfile.ZipFile(target, 'w', compression=zipfile.ZIP_DEFLATED)
+        self.date_time = time.gmtime(time.time() if mtime is None else max(mtime, 315532800))[:6]
+        self.target = target
+
+    def location(self, name):
+        return f"{self.target}:{name}"
+
+    def write(self, name, data):
+        info = zipfile.ZipInfo(name.replace(os.sep, "/"), self.date_time)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        self.archive.writestr(info, data)
+
+    def close(self):
+        self.archive.close()
+
+
+class TarSink(Sink):
+    """Stream every result into one tar file, optionally compressed"""
+    writes_manifest = True
+
+    def __init__(self, target, mode='w|', mtime=None):
+        if hasattr(target, 'write'):
+            self.archive = tarfile.open(fileobj=target, mode=mode)
+        else:
+            self.archive = tarfile.open(target, mode=mode)
+        self.mtime = int(time.time() if mtime is None else mtime)
+        self.target = target if isinstance(target, str) else "-"
+
+    def location(self, name):
+        return f"{self.target}:{name}"
+
+    def write(self, name, data):
+        info = tarfile.TarInfo(name.replace(os.sep, "/"))
+        info.size = len(data)
+        info.mtime = self.mtime
+        self.archive.addfile(info, io.BytesIO(data))
+
+    def close(self):
+        self.archive.close()
+
+
+class StdoutSink(TarSink):
+    """Stream an uncompressed tar of every result to standard output"""
+    to_stdout = True
+
+    def __init__(self, mtime=None):
+        super().__init__(sys.stdout.buffer, 'w|', mtime)
+
+    def close(self):
+        super().close()
+        sys.stdout.buffer.flush()
+
+
+def open_sink(target, output_dir="output", mtime=None):
+    """Return the sink for an --archive target, or a DirectorySink when target is None
+
+    '-' streams a tar to stdout; otherwise the format follows the file extension.
+    `mtime` pins the timestamp of archive entries, e.g. to SOURCE_DATE_EPOCH.
+    """
+    if target is None:
+        return DirectorySink(output_dir)
+    if target == "-":
+        return StdoutSink(mtime)
+    lowered = target.lower()
+    if lowered.endswith(".zip"):
+        return ZipSink(target, mtime)
+    for extension, mode in TAR_MODES.items():
+        if lowered.endswith(extension):
+            return TarSink(target, mode, mtime)
+    raise ValueError(f"Cannot tell the archive format of '{target}': use .zip, .tar, .tar.gz, .tar.bz2 or .tar.xz")
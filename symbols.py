@@ -0,0 +1,359 @@
+"""Whole-module symbol table built in one analysis pass before conversion
+
+Every function and Main gets a scope listing the variables it assigns, in order
+of first assignment. Types are inferred from the values that flow into each
+variable, in statement order: literals, input() and its hint comment, calls with
+a signature comment, conversions such as int(...), and operator results. A
+variable assigned both Integer and Real values becomes Real; hint comments
+always win. The converter declares every symbol at the top of its function and
+only looks types up while emitting.
+"""
+import ast
+from itertools import chain
+
+TYPE_NAMES = {
+    'int': 'Integer',
+    'integer': 'Integer',
+    'str': 'String',
+    'string': 'String',
+    'float': 'Real',
+    'double': 'Real',
+    'real': 'Real',
+    'bool': 'Boolean',
+    'boolean': 'Boolean',
+    'void': 'None'
+}
+
+CALL_TYPES = {
+    'int': 'Integer', 'len': 'Integer', 'float': 'Real', 'str': 'String', 'input': 'String', 'bool': 'Boolean',
+    'Size': 'Integer', 'Len': 'Integer', 'ToCode': 'Integer', 'ToInteger': 'Integer', 'Int': 'Integer',
+    'Random': 'Integer', 'ToReal': 'Real', 'Sqrt': 'Real', 'Sin': 'Real', 'Cos': 'Real', 'Tan': 'Real',
+    'ArcSin': 'Real', 'ArcCos': 'Real', 'ArcTan': 'Real', 'Log': 'Real', 'Log10': 'Real', 'Sgn': 'Integer',
+    'Char': 'String', 'ToChar': 'String', 'ToString': 'String', 'ToFixed': 'String',
+}
+
+CONVERSIONS = ('int', 'float', 'str')
+
+
+def flowgorithm_type(name, default="Integer"):
+    """Map a hint or signature type name such as 'int' to its Flowgorithm type"""
+    return TYPE_NAMES.get(name.lower(), default)
+
+
+def join(current, new):
+    """Combine the types assigned to one variable; Integer and Real widen to Real"""
+    if current is None or current == new:
+        return new
+    if new is None:
+        return current
+    if {current, new} == {"Integer", "Real"}:
+        return "Real"
+    return current
+
+
+def input_call(value):
+    """Return the input() call of `input(...)` or `int(input(...))`, else None"""
+    if isinstance(value, ast.Call) and isinstance(value.func, ast.Name):
+        if value.func.id == 'input':
+            return value
+        if value.func.id in CONVERSIONS and len(value.args) == 1:
+            return input_call(value.args[0]) if isinstance(value.args[0], ast.Call) else None
+    return None
+
+
+def find_return_variable(body):
+    """Return the name returned by a top-level `return name` in a function body"""
+    for stmt in body:
+        if isinstance(stmt, ast.Return) and isinstance(stmt.value, ast.Name):
+            return stmt.value.id
+    return None
+
+
+class Symbol:
+    """One variable of a scope; `fixed` types come from a hint comment or signature"""
+    __slots__ = ('name', 'type', 'array', 'size', 'parameter', 'fixed', 'read')
+
+    def __init__(self, name, type=None, array=False, size="", parameter=False, fixed=False):
+        self.name = name
+        self.type = type
+        self.array = array
+        self.size = size
+        self.parameter = parameter
+        self.fixed = fixed
+        self.read = False
+
+
+class Scope:
+    """The symbols of one function, or of Main when name is None"""
+
+    def __init__(self, name=None):
+        self.name = name
+        self.symbols = {}
+        self.return_type = "None"
+        self.return_variable = ""
+        self.early_reads = set()
+        self.changed = False
+
+    def get(self, name):
+        return self.symbols.get(name)
+
+    def types(self):
+        """Return a fresh {name: type} map of every symbol, parameters included"""
+        return {name: symbol.type for name, symbol in self.symbols.items()}
+
+    def parameters(self):
+        return [symbol for symbol in self.symbols.values() if symbol.parameter]
+
+    def declarations(self):
+        """Return the symbols the function body has to declare, in order of first assignment"""
+        return [symbol for symbol in self.symbols.values() if not symbol.parameter]
+
+    def key(self):
+        """Return everything about this scope that affects its converted output"""
+        return (self.return_type, self.return_variable,
+                tuple((s.name, s.type, s.array, s.size, s.parameter) for s in self.symbols.values()))
+
+
+class SymbolTable:
+    """Scopes of a whole module, built from its AST and the extracted hint comments"""
+
+    def __init__(self, comments=None, hints=None, function_signatures=None, max_passes=4):
+        self.comments = comments if comments is not None else {}
+        self.hints = hints if hints is not None else {}
+        self.function_signatures = function_signatures if function_signatures is not None else {}
+        self.max_passes = max_passes
+        self.scopes = {}
+
+    def scope(self, name):
+        """Return the scope of a function, or of Main for None; empty if never analyzed"""
+        scope = self.scopes.get(name)
+        if scope is None:
+            scope = self.scopes[name] = Scope(name)
+        return scope
+
+    def build(self, tree):
+        """Analyze every top-level function in source order, then Main"""
+        main_statements = []
+        for stmt in tree.body:
+            if isinstance(stmt, ast.FunctionDef):
+                self.analyze_function(stmt)
+            else:
+                main_statements.append(stmt)
+        self.analyze_scope(self.scope(None), main_statements)
+        return self
+
+    def analyze_function(self, func_def):
+        scope = self.scopes[func_def.name] = Scope(func_def.name)
+        param_types = []
+        signature = self.function_signatures.get(func_def.name)
+        if signature is not None:
+            scope.return_type = flowgorithm_type(signature['return_type'])
+            param_types = [flowgorithm_type(name) for name in signature['param_types']]
+
+        for i, param in enumerate(func_def.args.args):
+            param_type = param_types[i] if i < len(param_types) else "Integer"
+            scope.symbols[param.arg] = Symbol(param.arg, param_type, parameter=True, fixed=True)
+
+        if scope.return_type != "None":
+            scope.return_variable = find_return_variable(func_def.body) or "result"
+            if scope.return_variable not in scope.symbols:
+                scope.symbols[scope.return_variable] = Symbol(scope.return_variable, scope.return_type, fixed=True)
+        self.analyze_scope(scope, func_def.body)
+
+    def analyze_scope(self, scope, statements):
+        """Run the flow pass until no type read earlier changes, then default the rest"""
+        for _ in range(self.max_passes):
+            scope.changed = False
+            self.analyze_statements(scope, statements)
+            if not scope.changed:
+                break
+        for symbol in scope.symbols.values():
+            if symbol.type is None:
+                symbol.type = "Integer"
+
+    def analyze_statements(self, scope, statements):
+        """Visit the statements the converter lowers, in source order, without recursing"""
+        stack = [iter(statements)]
+        while stack:
+            stmt = next(stack[-1], None)
+            if stmt is None:
+                stack.pop()
+                continue
+
+            kind = type(stmt)
+            if kind is ast.Assign:
+                self.analyze_assign(scope, stmt)
+            elif kind is ast.AugAssign:
+                if isinstance(stmt.target, ast.Name):
+                    value = ast.BinOp(left=stmt.target, op=stmt.op, right=stmt.value)
+                    self.assign(scope, stmt.target.id, self.infer(scope, value))
+            elif kind is ast.For:
+                if isinstance(stmt.target, ast.Name):
+                    self.assign(scope, stmt.target.id, self.iteration_type(scope, stmt.iter))
+                stack.append(iter(stmt.body))
+            elif kind is ast.If:
+                stack.append(chain(stmt.body, stmt.orelse))
+            elif kind is ast.While:
+                stack.append(iter(stmt.body))
+
+    def analyze_assign(self, scope, stmt):
+        if len(stmt.targets) != 1:
+            return
+        target, value = stmt.targets[0], stmt.value
+
+        if isinstance(target, ast.Subscript):
+            if isinstance(target.value, ast.Name):
+                symbol = scope.get(target.value.id)
+                if symbol is not None and symbol.array:
+                    self.assign(scope, symbol.name, self.infer(scope, value))
+            return
+        if not isinstance(target, ast.Name):
+            return
+
+        name = target.id
+        if input_call(value) is not None:
+            self.assign(scope, name, CALL_TYPES[value.func.id])
+        elif isinstance(value, ast.List):
+            size = len(value.elts)
+            size_hint = self.hints.get((stmt.lineno, scope.name)) or self.comments.get((scope.name, name))
+            if size_hint is not None and size_hint.isdigit():
+                size = int(size_hint)
+            self.assign(scope, name, self.element_type(scope, value.elts), array=True, size=size)
+        else:
+            self.assign(scope, name, self.infer(scope, value))
+
+    def assign(self, scope, name, value_type, array=False, size=0):
+        """Record that a value of value_type flows into a variable"""
+        symbol = scope.symbols.get(name)
+        if symbol is None:
+            hint = self.comments.get((scope.name, name))
+            fixed = hint is not None and hint in TYPE_NAMES
+            symbol = scope.symbols[name] = Symbol(name, TYPE_NAMES[hint] if fixed else None, fixed=fixed)
+            if name in scope.early_reads:
+                scope.changed = True
+
+        if array:
+            if not symbol.array:
+                symbol.array = True
+                scope.changed = scope.changed or symbol.read
+            if not symbol.size or int(symbol.size) < size:
+                symbol.size = str(size)
+        if symbol.fixed:
+            return
+        joined = join(symbol.type, value_type)
+        if joined != symbol.type:
+            scope.changed = scope.changed or symbol.read
+            symbol.type = joined
+
+    def iteration_type(self, scope, iterable):
+        """Type of a for loop variable: Integer for range(), the element type of an array"""
+        if isinstance(iterable, ast.Name):
+            symbol = scope.get(iterable.id)
+            if symbol is not None:
+                symbol.read = True
+                return symbol.type
+        return "Integer"
+
+    def element_type(self, scope, elements):
+        """Join the types of list literal elements, cheaply for long constant lists"""
+        element_type = None
+        for elem in elements:
+            if type(elem) is ast.Constant:
+                elem_type = CONSTANT_TYPES.get(type(elem.value), "String")
+            else:
+                elem_type = self.infer(scope, elem)
+            element_type = join(element_type, elem_type)
+        return element_type or "Integer"
+
+    def infer(self, scope, expr):
+        """Return the Flowgorithm type of an expression, or None while it is unknown
+
+        Operands are evaluated from an explicit stack, so long operator chains never
+        recurse. A binary operator is pushed below its operands and combines their
+        two results once both are known.
+        """
+        results = []
+        stack = [expr]
+        while stack:
+            node = stack.pop()
+            kind = type(node)
+            if kind is ast.Name:
+                symbol = scope.symbols.get(node.id)
+                if symbol is None:
+                    scope.early_reads.add(node.id)
+                    results.append(None)
+                else:
+                    symbol.read = True
+                    results.append(symbol.type)
+            elif kind is ast.Constant:
+                results.append(CONSTANT_TYPES.get(type(node.value)))
+            elif kind is ast.BinOp:
+                stack.append(node.op)
+                stack.append(node.right)
+                stack.append(node.left)
+            elif kind in OPERATOR_TYPES:
+                right = results.pop()
+                results.append(binop_type(node, results.pop(), right))
+            elif kind is ast.UnaryOp:
+                if type(node.op) is ast.Not:
+                    results.append("Boolean")
+                else:
+                    stack.append(node.operand)
+            elif kind is ast.IfExp:
+                stack.append(_JOIN)
+                stack.append(node.orelse)
+                stack.append(node.body)
+            elif node is _JOIN:
+                right = results.pop()
+                results.append(join(results.pop(), right))
+            elif kind is ast.Compare or kind is ast.BoolOp:
+                results.append("Boolean")
+            elif kind is ast.Subscript:
+                results.append(self.subscript_type(scope, node))
+            elif kind is ast.Call:
+                results.append(self.call_type(scope, node))
+            else:
+                results.append(None)
+        return results[0]
+
+    def subscript_type(self, scope, node):
+        if isinstance(node.value, ast.Name):
+            symbol = scope.get(node.value.id)
+            if symbol is not None:
+                symbol.read = True
+                return symbol.type
+        return None
+
+    def call_type(self, scope, node):
+        if not isinstance(node.func, ast.Name):
+            return None
+        name = node.func.id
+        signature = self.function_signatures.get(name)
+        if signature is not None:
+            return_type = flowgorithm_type(signature['return_type'])
+            return None if return_type == "None" else return_type
+        if name in ('abs', 'Abs') and node.args:
+            return self.infer(scope, node.args[0])
+        return CALL_TYPES.get(name)
+
+
+CONSTANT_TYPES = {bool: "Boolean", int: "Integer", float: "Real", str: "String"}
+
+OPERATOR_TYPES = frozenset(ast.operator.__subclasses__())
+
+# Marks where the two branch types of a conditional expression are joined
+_JOIN = object()
+
+
+def binop_type(op, left, right):
+    """Result type of a binary operator; & joins strings in the converted sources"""
+    kind = type(op)
+    if kind is ast.Div:
+        return "Real"
+    if kind is ast.FloorDiv:
+        return "Integer"
+    if (left == "String" or right == "String") and (kind is ast.Add or kind is ast.BitAnd):
+        return "String"
+    if left is None or right is None:
+        return left or right
+    return join(left, right)
@@ -0,0 +1,126 @@
+import ast
+import io
+import os
+import time
+
+from converter import ConversionError, PythonToFlowgorithmConverter
+from diagnostics import DiagnosticCollector
+
+
+class IncrementalConverter:
+    """Convert successive versions of one file, re-converting only what changed
+
+    A function's output depends on its own lines and on its scope in the symbol
+    table, which also carries the types inferred from the rest of the module.
+    Together they are the cache key for its converted subtree; the Main body is
+    keyed the same way.
+    """
+
+    def __init__(self, converter=None):
+        self.converter = converter or PythonToFlowgorithmConverter()
+        self.functions = {}
+        self.main = None
+
+    def segment(self, lines, nodes):
+        """Return the full source lines spanned by the given statements"""
+        return "".join("".join(lines[node.lineno - 1:node.end_lineno]) for node in nodes)
+
+    def convert(self, source, name, diagnostics=None):
+        """Return (fprg_text, reconverted, total) for the new source
+
+        Only the re-converted segments report into `diagnostics`.
+        """
+        worker = self.converter.new_converter(diagnostics)
+        worker.source_name = name
+        try:
+            tree = ast.parse(source, filename=name)
+        except (RecursionError, MemoryError, ValueError) as e:
+            raise ConversionError(str(worker.report_unparseable(e))) from e
+        lines = source.splitlines(keepends=True)
+        functions, main_statements = worker.split_module(tree)
+        worker.extract_comments(source, tree)
+        worker.analyze(tree)
+
+        root = worker.create_program(name)
+        cached = {}
+        reconverted = 0
+        for func_def in functions:
+            nodes = func_def.decorator_list + [func_def]
+            key = (self.segment(lines, nodes), worker.symbols.scope(func_def.name).key())
+            element = cached.get(key)
+            if element is None:
+                element = self.functions.get(key)
+            if element is None:
+                element = worker.convert_function(func_def)
+                reconverted += 1
+            cached[key] = element
+            root.functions.append(element)
+        self.functions = cached
+
+        main_key = (self.segment(lines, main_statements), worker.symbols.scope(None).key())
+        if self.main is None or self.main[0] != main_key:
+            self.main = (main_key, worker.convert_main(main_statements))
+            reconverted += 1
+        root.functions.append(self.main[1])
+
+        buffer = io.StringIO()
+        worker.write_xml(root, buffer)
+        return buffer.getvalue(), reconverted, len(functions) + 1
+
+
+def watch(sources, output_dir="output", interval=0.5, options=None):
+    """Poll the sources and rewrite their .fprg output whenever they change"""
+    converters = {}
+    last_seen = {}
+    print(f"Watching {len(sources)} file(s), press Ctrl+C to stop")
+    try:
+        while True:
+            for source_path, relative in sources:
+                try:
+                    stat = os.stat(source_path)
+                except OSError:
+                    continue
+                signature = (stat.st_mtime_ns, stat.st_size)
+                if last_seen.get(source_path) == signature:
+                    continue
+                last_seen[source_path] = signature
+
+                output_path = os.path.join(output_dir, os.path.splitext(relative)[0] + ".fprg")
+                incremental = converters.setdefault(
+                    source_path, IncrementalConverter(PythonToFlowgorithmConverter(**(options or {}))))
+                update(incremental, source_path, output_path)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+
+
+def update(incremental, source_path, output_path):
+    """Re-convert one changed file and report what was redone"""
+    start = time.perf_counter()
+    diagnostics = DiagnosticCollector()
+    try:
+        with open(source_path, 'r', encoding='utf-8') as f:
+            source = f.read()
+        text, reconverted, total = incremental.convert(source, source_path, diagnostics)
+    except (OSError, UnicodeDecodeError) as e:
+        # Saved with another encoding, or deleted since it was polled; keep watching
+        print(f"Error reading '{source_path}': {e}")
+        return False
+    except (SyntaxError, ConversionError) as e:
+        print(f"Error converting '{source_path}': {e}")
+        return False
+    finally:
+        for diagnostic in diagnostics:
+            print(diagnostic)
+
+    try:
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+    except OSError as e:
+        print(f"Error writing output file: {e}")
+        return False
+
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"Updated '{output_path}': {reconverted}/{total} function(s) re-converted in {elapsed:.1f} ms")
+    return True
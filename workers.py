@@ -0,0 +1,72 @@
+"""Worker processes shared by the conversion server and the asyncio front end
+
+Each worker of a pool from `start_pool` creates one converter when it starts and
+reuses it for every conversion; `time_limit` bounds a conversion inside a worker.
+"""
+import contextlib
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+
+from converter import PythonToFlowgorithmConverter
+
+_converter = None
+
+
+class TimeLimitExceeded(BaseException):
+    """Raised by the alarm; not an Exception, so no `except Exception` can swallow it"""
+
+
+def _init_worker(options):
+    """Create the long-lived converter for this worker process"""
+    global _converter
+    _converter = PythonToFlowgorithmConverter(**options)
+
+
+def _ping():
+    return os.getpid()
+
+
+def _alarm(signum, frame):
+    raise TimeLimitExceeded
+
+
+def start_pool(jobs, options=None):
+    """Return a process pool whose workers each keep a converter created with options"""
+    return ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(options or {},))
+
+
+def warm_up(pool, jobs):
+    """Start every worker process up front so the first requests are fast"""
+    for future in [pool.submit(_ping) for _ in range(jobs)]:
+        future.result()
+
+
+def worker_converter():
+    """Return the converter of the current worker process"""
+    return _converter
+
+
+@contextlib.contextmanager
+def time_limit(seconds):
+    """Raise TimeLimitExceeded in the body once `seconds` have passed
+
+    None, or a platform without an interval timer, means no limit. The timer is
+    disarmed and the previous SIGALRM handler restored even when the alarm fires
+    after the body finished, in which case the body's result stands.
+    """
+    if seconds is None or not hasattr(signal, 'setitimer'):
+        yield
+        return
+    previous = signal.signal(signal.SIGALRM, _alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        while True:
+            try:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+                signal.signal(signal.SIGALRM, previous)
+                break
+            except TimeLimitExceeded:
+                pass